@@ -0,0 +1,56 @@
+"""
+Finding a user's active budget.
+
+User.active_budget points at it, so the lookup is one primary-key read:
+the pointer comes with request.user, which CachedModelBackend serves from
+the cache. budget_setup moves the pointer when it switches budgets. A
+missing or stale pointer (budgets activated elsewhere, users from before
+the pointer existed) falls back to the is_active query and is repaired,
+but only from a read of the primary, never from a replica that may lag.
+
+Views call get_active_budget(request), which resolves the budget at most
+once per request.
+"""
+from django.db import router
+from django.db.models import prefetch_related_objects
+
+from .models import MonthlyBudget
+
+
+def active_budget_for(user):
+    """The user's active MonthlyBudget, or None"""
+    budget = None
+    if user.active_budget_id is not None:
+        try:
+            budget = MonthlyBudget.objects.get(pk=user.active_budget_id, user=user, is_active=True)
+        except MonthlyBudget.DoesNotExist:
+            pass
+    if budget is None:
+        budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+        budget_id = budget.pk if budget else None
+        if (
+            budget_id != user.active_budget_id
+            and router.db_for_read(MonthlyBudget) == router.db_for_write(MonthlyBudget)
+        ):
+            set_active_budget(user, budget)
+    return budget
+
+
+def set_active_budget(user, budget):
+    """Point ``user`` at ``budget`` (or None); saving drops the cached user"""
+    user.active_budget_id = budget.pk if budget else None
+    user.save(update_fields=['active_budget'])
+
+
+def get_active_budget(request, categories=False):
+    """The request user's active budget, resolved at most once per request.
+
+    With ``categories``, the budget's categories are loaded too, so
+    ``budget.categories.all()`` is served without another query.
+    """
+    if not hasattr(request, '_active_budget'):
+        request._active_budget = active_budget_for(request.user)
+    budget = request._active_budget
+    if categories and budget is not None:
+        prefetch_related_objects([budget], 'categories')  # no-op once loaded
+    return budget
@@ -1,46 +1,165 @@
 from django.contrib import admin
-from .models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, Goal
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+from .models import MonthlyBudget, Category, Transaction, DailySummary, MonthlySummary, Goal, GoalContribution, LedgerEntry, SpendingAnomaly, FxRate
+
+
+def estimated_row_count(model, using):
+    """Row count from planner statistics, or None if the database has none"""
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+            elif connection.vendor == 'sqlite':
+                # Populated by ANALYZE; the first number is the table's row count
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that never runs an unbounded COUNT(*) on a large table.
+
+    Unfiltered changelists use the planner's estimate; filtered ones count at
+    most EXACT_COUNT_LIMIT + 1 rows, which is enough to page through results
+    and tells the admin to narrow the filter beyond that.
+    """
+    EXACT_COUNT_LIMIT = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.EXACT_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:self.EXACT_COUNT_LIMIT + 1].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow with every user"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
 
 @admin.register(MonthlyBudget)
-class MonthlyBudgetAdmin(admin.ModelAdmin):
-    list_display = ('user', 'start_date', 'end_date', 'total_budget', 'is_active', 'created_at')
-    list_filter = ('is_active', 'start_date', 'created_at')
+class MonthlyBudgetAdmin(LargeTableAdmin):
+    list_display = ('user', 'start_date', 'end_date', 'total_budget', 'currency', 'is_active', 'is_archived', 'created_at')
+    list_filter = ('is_active', 'is_archived', 'start_date', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     search_fields = ('user__email', 'user__name')
-    readonly_fields = ('created_at', 'updated_at')
+    # Transactions were converted to the currency when written
+    readonly_fields = ('currency', 'created_at', 'updated_at')
     date_hierarchy = 'start_date'
 
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LargeTableAdmin):
     list_display = ('category_name', 'monthly_budget', 'allocated_amount', 'is_custom', 'created_at')
     list_filter = ('is_custom', 'category_type', 'created_at')
+    list_select_related = ('monthly_budget__user',)
+    raw_id_fields = ('monthly_budget',)
     search_fields = ('category_name', 'monthly_budget__user__email')
     readonly_fields = ('created_at',)
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('transaction_type', 'amount', 'category', 'date', 'monthly_budget', 'created_at')
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ('transaction_type', 'amount', 'currency', 'category', 'date', 'monthly_budget', 'created_at')
     list_filter = ('transaction_type', 'date', 'created_at')
+    list_select_related = ('category', 'monthly_budget__user')
+    raw_id_fields = ('monthly_budget', 'category')
     search_fields = ('note', 'category__category_name', 'monthly_budget__user__email')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date'
 
 @admin.register(DailySummary)
-class DailySummaryAdmin(admin.ModelAdmin):
+class DailySummaryAdmin(LargeTableAdmin):
     list_display = ('date', 'monthly_budget', 'total_income', 'total_expense', 'net_amount')
     list_filter = ('date',)
+    list_select_related = ('monthly_budget__user',)
+    raw_id_fields = ('monthly_budget',)
     search_fields = ('monthly_budget__user__email',)
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'date'
 
 @admin.register(MonthlySummary)
-class MonthlySummaryAdmin(admin.ModelAdmin):
+class MonthlySummaryAdmin(LargeTableAdmin):
     list_display = ('monthly_budget', 'total_income', 'total_expense', 'remaining_balance', 'savings_rate')
+    list_select_related = ('monthly_budget__user',)
+    raw_id_fields = ('monthly_budget',)
     search_fields = ('monthly_budget__user__email',)
     readonly_fields = ('created_at', 'updated_at')
 
 @admin.register(Goal)
-class GoalAdmin(admin.ModelAdmin):
+class GoalAdmin(LargeTableAdmin):
     list_display = ('title', 'user', 'target_amount', 'current_progress', 'target_date', 'is_completed')
     list_filter = ('is_completed', 'target_date', 'created_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
     search_fields = ('title', 'user__email', 'user__name')
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(GoalContribution)
+class GoalContributionAdmin(LargeTableAdmin):
+    list_display = ('goal', 'amount', 'created_at')
+    list_select_related = ('goal',)
+    raw_id_fields = ('goal',)
+    search_fields = ('goal__title', 'goal__user__email')
+    readonly_fields = ('created_at',)
+    date_hierarchy = 'created_at'
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(LargeTableAdmin):
+    list_display = ('monthly_budget', 'sequence', 'action', 'transaction_id', 'date', 'delta_minor', 'recorded_at')
+    list_filter = ('action', 'date')
+    list_select_related = ('monthly_budget__user',)
+    raw_id_fields = ('monthly_budget',)
+    search_fields = ('=transaction_id', 'monthly_budget__user__email')
+    date_hierarchy = 'date'
+
+    # The ledger is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(SpendingAnomaly)
+class SpendingAnomalyAdmin(LargeTableAdmin):
+    list_display = ('date', 'category_name', 'monthly_budget', 'amount', 'expected', 'score')
+    list_filter = ('date',)
+    list_select_related = ('monthly_budget__user',)
+    raw_id_fields = ('monthly_budget',)
+    search_fields = ('category_name', 'monthly_budget__user__email')
+    readonly_fields = ('detected_at',)
+    date_hierarchy = 'date'
+
+@admin.register(FxRate)
+class FxRateAdmin(LargeTableAdmin):
+    list_display = ('date', 'currency', 'rate')
+    list_filter = ('currency',)
+    search_fields = ('=currency',)
+    date_hierarchy = 'date'
+
+    # Loaded with load_fx_rates, which also tells every process to reload them
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,158 @@
+"""
+Nightly detection of unusually high spending.
+
+detect_anomalies(day) scores every user's spending on ``day`` against the
+LOOKBACK_DAYS before it: the day's total (from DailySummary) and the total
+of each category (transactions grouped by category name, as in the trends
+rollup, since categories are recreated every period). Users are handled
+CHUNK_USERS at a time; within a chunk every (user, category) series is one
+row of a NumPy matrix, so the statistics for all of them come from a few
+array operations.
+
+The score is a robust z-score against a day-of-week baseline:
+
+    expected = median spend on the same weekday (the overall median when
+               that weekday has fewer than MIN_WEEKDAY_DAYS data points)
+    score    = (spend - expected) / (MAD / 0.6745)
+
+where MAD is the median absolute deviation of the history from its
+baselines (1.2533 * the mean absolute deviation when the MAD is zero). Only
+days with spending count as history, so a category used once a week is
+compared with its usual purchase size rather than with the empty days in
+between. Days scoring above THRESHOLD are stored as SpendingAnomaly rows.
+
+Unlike money.py, this module needs NumPy.
+"""
+import warnings
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import F, Sum
+
+from .models import DailySummary, MonthlyBudget, SpendingAnomaly, Transaction
+from .money import _numpy, from_minor, to_minor
+
+LOOKBACK_DAYS = 84  # twelve of each weekday
+CHUNK_USERS = 500
+MIN_HISTORY_DAYS = 8
+MIN_WEEKDAY_DAYS = 3
+THRESHOLD = 3.5
+MAD_SCALE = 0.6745  # MAD / 0.6745 estimates the standard deviation
+MEAN_AD_SCALE = 1.2533  # likewise for the mean absolute deviation
+TOTAL = ''  # category_name of the day-total series
+
+
+def numpy_available():
+    return _numpy() is not None
+
+
+def _user_chunks(first, day):
+    """Ids of users with a budget overlapping first..day, CHUNK_USERS at a time"""
+    user_ids = (
+        MonthlyBudget.objects.filter(start_date__lte=day, end_date__gte=first)
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+    last = 0
+    while True:
+        chunk = list(user_ids.filter(user_id__gt=last)[:CHUNK_USERS])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+def _spending(budget_users, first, day):
+    """(user_id, budget_id, category_name, date, cents) for every day with spending"""
+    totals = DailySummary.objects.filter(
+        monthly_budget_id__in=list(budget_users), date__range=(first, day), total_expense__gt=0
+    ).values_list('monthly_budget_id', 'date', 'total_expense')
+    for budget_id, date, expense in totals.iterator():
+        yield budget_users[budget_id], budget_id, TOTAL, date, to_minor(expense)
+
+    by_category = (
+        Transaction.objects.filter(
+            monthly_budget_id__in=list(budget_users), date__range=(first, day),
+            transaction_type='expense', category__isnull=False,
+        )
+        .values_list('monthly_budget_id', 'category__category_name', 'date')
+        .annotate(total=Sum('amount_minor'))
+        .order_by()
+    )
+    for budget_id, name, date, total in by_category.iterator():
+        if total:
+            yield budget_users[budget_id], budget_id, name, date, total
+
+
+def score_spending(rows, day):
+    """Unsaved SpendingAnomaly rows for the series in ``rows`` that spike on ``day``"""
+    np = _numpy()
+    first = day - timedelta(days=LOOKBACK_DAYS)
+
+    series, budget_on_day, row_index, column_index, cents = {}, {}, [], [], []
+    for user_id, budget_id, name, date, amount in rows:
+        index = series.setdefault((user_id, name), len(series))
+        row_index.append(index)
+        column_index.append((date - first).days)
+        cents.append(amount)
+        if date == day:
+            budget_on_day[index] = budget_id
+    if not budget_on_day:
+        return []
+
+    spend = np.zeros((len(series), LOOKBACK_DAYS + 1))
+    np.add.at(spend, (np.asarray(row_index), np.asarray(column_index)), np.asarray(cents, dtype=np.float64))
+    spend[spend == 0] = np.nan  # history counts spending days only
+    history, today = spend[:, :-1], spend[:, -1]
+    weekdays = (first.toordinal() + np.arange(LOOKBACK_DAYS)) % 7
+
+    # NaN rows and zero spreads are expected; they are filtered out below
+    with warnings.catch_warnings(), np.errstate(divide='ignore', invalid='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        days_seen = np.count_nonzero(~np.isnan(history), axis=1)
+        overall = np.nanmedian(history, axis=1)
+        baseline = np.empty((len(series), 7))
+        for weekday in range(7):
+            same = history[:, weekdays == weekday]
+            enough = np.count_nonzero(~np.isnan(same), axis=1) >= MIN_WEEKDAY_DAYS
+            baseline[:, weekday] = np.where(enough, np.nanmedian(same, axis=1), overall)
+        deviation = np.abs(history - baseline[:, weekdays])
+        mad = np.nanmedian(deviation, axis=1)
+        spread = np.where(mad > 0, mad / MAD_SCALE, MEAN_AD_SCALE * np.nanmean(deviation, axis=1))
+        expected = baseline[:, day.toordinal() % 7]
+        score = (today - expected) / spread
+
+    flagged = np.flatnonzero((days_seen >= MIN_HISTORY_DAYS) & (spread > 0) & (score > THRESHOLD))
+    keys = list(series)
+    return [
+        SpendingAnomaly(
+            monthly_budget_id=budget_on_day[index],
+            date=day,
+            category_name=keys[index][1],
+            amount=from_minor(today[index]),
+            expected=from_minor(round(expected[index])),
+            score=round(float(score[index]), 2),
+        )
+        for index in flagged
+    ]
+
+
+def detect_anomalies(day):
+    """Score all users' spending on ``day``; returns the number of anomalies stored"""
+    first = day - timedelta(days=LOOKBACK_DAYS)
+    stored = 0
+    for user_ids in _user_chunks(first, day):
+        budget_users = dict(
+            MonthlyBudget.objects.filter(user_id__in=user_ids, start_date__lte=day, end_date__gte=first)
+            .values_list('pk', 'user_id')
+        )
+        anomalies = score_spending(_spending(budget_users, first, day), day)
+        with transaction.atomic(using=router.db_for_write(SpendingAnomaly)):
+            # Re-running a day replaces its results
+            replaced = SpendingAnomaly.objects.filter(monthly_budget_id__in=list(budget_users), date=day)
+            changed = {*replaced.values_list('monthly_budget_id', flat=True), *(a.monthly_budget_id for a in anomalies)}
+            replaced.delete()
+            SpendingAnomaly.objects.bulk_create(anomalies)
+            # Dashboards list the anomalies (see conditional.py)
+            MonthlyBudget.objects.filter(pk__in=changed).update(version=F('version') + 1)
+        stored += len(anomalies)
+    return stored
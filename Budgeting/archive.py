@@ -0,0 +1,173 @@
+"""
+Cold storage for inactive budgets.
+
+archive_budget() moves a closed budget's categories, transactions and daily
+summaries into a single zlib-compressed, column-oriented BudgetArchive row
+and deletes them from the hot tables. MonthlySummary and CategorySummary stay
+online, so dashboards and trends never need the detail rows.
+rehydrate_budget() restores the rows with their original primary keys when a
+user opens an archived budget.
+"""
+import datetime
+import json
+import zlib
+from contextvars import ContextVar
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router, transaction
+
+from .models import (
+    BalanceSnapshot, BudgetArchive, Category, CategorySummary, DailySummary, LedgerEntry, MonthlyBudget, Transaction,
+)
+
+# Restore order: referenced rows first. Deletes run in reverse.
+ARCHIVED_MODELS = [LedgerEntry, BalanceSnapshot, Category, Transaction, DailySummary]
+PAYLOAD_VERSION = 1
+
+# Set while archive_budget() deletes the rows it has just stored. Those
+# deletes are not changes to the budget: the ledger, version and live
+# update signals skip them (see signals.py).
+_archiving = ContextVar('archiving', default=False)
+
+
+def is_archiving():
+    return _archiving.get()
+
+
+class _ArchiveEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, but keeps datetimes at full microsecond precision"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def _columns(model, queryset):
+    """Rows of ``queryset`` as {attname: [values, ...]}"""
+    names = [field.attname for field in model._meta.concrete_fields]
+    rows = list(queryset.order_by('pk').values_list(*names))
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+
+def _rows(model, columns):
+    """Inverse of _columns(): unsaved model instances with typed values"""
+    fields = [model._meta.get_field(name) for name in columns] if columns else []
+    if not fields:
+        return []
+    size = len(next(iter(columns.values())))
+    converted = {
+        field.attname: [None if v is None else field.to_python(v) for v in columns[field.attname]]
+        for field in fields
+    }
+    return [model(**{name: values[i] for name, values in converted.items()}) for i in range(size)]
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def restore_rows(model, rows, using):
+    """Insert rows exactly as given: primary keys and timestamps included"""
+    if not rows:
+        return
+    # bulk_create() re-stamps auto_now fields; put the originals back
+    stamped = [
+        f.attname for f in model._meta.concrete_fields
+        if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)
+    ]
+    originals = [[getattr(row, name) for name in stamped] for row in rows]
+    model.objects.using(using).bulk_create(rows, batch_size=1000)
+    if stamped:
+        for row, values in zip(rows, originals):
+            for name, value in zip(stamped, values):
+                setattr(row, name, value)
+        model.objects.using(using).bulk_update(rows, stamped, batch_size=1000)
+
+
+def archive_budget(budget):
+    """Move a budget's detail rows into a BudgetArchive; returns the archive"""
+    using = router.db_for_write(MonthlyBudget, instance=budget)
+    with transaction.atomic(using=using):
+        budget = MonthlyBudget.objects.using(using).select_for_update().get(pk=budget.pk)
+        if budget.is_archived:
+            return budget.archive
+
+        tables = {
+            _label(model): _columns(model, model.objects.using(using).filter(monthly_budget=budget))
+            for model in ARCHIVED_MODELS
+        }
+        # Deleting categories nulls CategorySummary.category; remember the links
+        links = dict(
+            CategorySummary.objects.using(using).filter(monthly_budget=budget, category__isnull=False)
+            .values_list('pk', 'category_id')
+        )
+        data = {'version': PAYLOAD_VERSION, 'tables': tables, 'category_summary_links': links}
+        payload = zlib.compress(json.dumps(data, cls=_ArchiveEncoder).encode(), 9)
+
+        archive = BudgetArchive.objects.using(using).create(
+            monthly_budget=budget,
+            payload=payload,
+            row_count=sum(len(next(iter(cols.values()), [])) for cols in tables.values()),
+        )
+
+        token = _archiving.set(True)
+        try:
+            for model in reversed(ARCHIVED_MODELS):
+                model.objects.using(using).filter(monthly_budget=budget).delete()
+        finally:
+            _archiving.reset(token)
+
+        MonthlyBudget.objects.using(using).filter(pk=budget.pk).update(is_archived=True)
+        MonthlyBudget.bump_version(budget.pk, using)
+    return archive
+
+
+def rehydrate_budget(budget):
+    """Restore an archived budget's rows into the hot tables"""
+    using = router.db_for_write(MonthlyBudget, instance=budget)
+    with transaction.atomic(using=using):
+        budget = MonthlyBudget.objects.using(using).select_for_update().get(pk=budget.pk)
+        if not budget.is_archived:
+            return budget
+
+        archive = budget.archive
+        data = json.loads(zlib.decompress(bytes(archive.payload)))
+        for model in ARCHIVED_MODELS:
+            restore_rows(model, _rows(model, data['tables'].get(_label(model), {})), using)
+
+        for summary_id, category_id in data['category_summary_links'].items():
+            CategorySummary.objects.using(using).filter(pk=summary_id).update(category_id=category_id)
+
+        archive.delete(using=using)
+        MonthlyBudget.objects.using(using).filter(pk=budget.pk).update(is_archived=False)
+        MonthlyBudget.bump_version(budget.pk)
+
+    budget.refresh_from_db()
+    return budget
+
+
+def archived_columns(archive, model):
+    """One table of ``archive`` as stored: {attname: [values, ...]} in JSON types"""
+    data = json.loads(zlib.decompress(bytes(archive.payload)))
+    return data['tables'].get(_label(model), {})
+
+
+def budget_columns(budget, model, names):
+    """Columns ``names`` of the budget's ``model`` rows, typed, from its archive if it has one"""
+    if budget.is_archived:
+        stored = archived_columns(budget.archive, model)
+        fields = [model._meta.get_field(name) for name in names]
+        return {
+            field.attname: [None if v is None else field.to_python(v) for v in stored.get(field.attname, [])]
+            for field in fields
+        }
+    rows = list(model.objects.filter(monthly_budget=budget).order_by('pk').values_list(*names))
+    return {name: [row[i] for row in rows] for i, name in enumerate(names)}
+
+
+def ensure_hot(budget):
+    """Rehydrate ``budget`` if it was archived; call before reading its rows"""
+    if budget is not None and budget.is_archived:
+        return rehydrate_budget(budget)
+    return budget
@@ -0,0 +1,252 @@
+"""
+Many transaction writes in one request (see views.transactions_batch_api).
+
+A batch is a list of operations:
+
+    {"op": "create", "transaction_type": "expense", "amount": "12.50",
+     "currency": "EUR", "category": 3, "date": "2026-10-01", "note": "lunch"}
+    {"op": "update", "id": 17, "amount": "20.00"}  # omitted fields keep their value
+    {"op": "delete", "id": 18}
+
+Fields and rules are those of the add/edit transaction forms; creates go to
+the active budget, and "currency" defaults to the budget's. Every operation is validated before anything is written,
+and if one is invalid the whole batch is rejected with each operation's
+errors. Otherwise the batch is applied in one database transaction with
+bulk_create/bulk_update, after converting the amounts of each budget
+currency in one vectorized pass (fx.convert_transactions), and each affected
+budget's summaries are refreshed once for all the days and categories the
+batch touched.
+
+Clients make retries safe with an Idempotency-Key: the response of an
+applied batch is stored under the key for KEY_LIFETIME and replayed when the
+same request arrives again.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db import router, transaction
+from django.utils import timezone
+
+from . import fx, ledger
+from .models import Category, IdempotencyKey, MonthlyBudget, Transaction
+from .money import CENT
+from .services import refresh_summaries
+
+MAX_OPERATIONS = 500
+MAX_AMOUNT = Decimal('9999999999.99')  # amount is max_digits=12, decimal_places=2
+KEY_LIFETIME = timedelta(hours=24)
+FIELDS = ('transaction_type', 'amount', 'currency', 'category', 'date', 'note')
+UPDATE_FIELDS = [
+    'transaction_type', 'amount', 'currency', 'amount_minor', 'category', 'date', 'note', 'updated_at'
+]
+
+
+class BatchError(Exception):
+    """Some operations are invalid; ``results`` holds the errors of each one"""
+
+    def __init__(self, results):
+        super().__init__(results)
+        self.results = results
+
+
+def _form_values(instance):
+    """An existing transaction as create/update operation fields"""
+    return {
+        'transaction_type': instance.transaction_type,
+        'amount': str(instance.amount),
+        'currency': instance.currency,
+        'category': instance.category_id,
+        'date': instance.date.isoformat(),
+        'note': instance.note,
+    }
+
+
+def _id(value):
+    """``value`` if it is a JSON integer id, else None (true/false are ints in Python)"""
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _clean(values, budget, category_budgets, errors):
+    """Typed field values; problems are appended to ``errors``"""
+    transaction_type = values.get('transaction_type')
+    if transaction_type not in ('income', 'expense'):
+        errors.append("transaction_type must be 'income' or 'expense'")
+
+    amount = None
+    try:
+        amount = Decimal(str(values.get('amount')))
+        if not 0 < amount <= MAX_AMOUNT:
+            errors.append("Amount must be greater than 0 and at most 9999999999.99")
+        elif amount != amount.quantize(CENT):
+            errors.append("Amount can have at most 2 decimal places")
+    except (InvalidOperation, ValueError):
+        errors.append("Invalid amount")
+
+    category_id = values.get('category')
+    if isinstance(category_id, str) and category_id.isdigit():
+        category_id = int(category_id)  # as posted by the forms
+    if category_id in (None, ''):
+        category_id = None
+        if transaction_type == 'expense':
+            errors.append("Category is required for expenses")
+    elif category_budgets.get(_id(category_id)) != budget.pk:
+        errors.append("Unknown category")
+
+    day = None
+    try:
+        day = datetime.strptime(values.get('date'), "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        errors.append("date must be YYYY-MM-DD")
+
+    currency = values.get('currency') or budget.currency
+    if not isinstance(currency, str):
+        errors.append("currency must be a currency code")
+    elif day is not None:
+        currency = currency.upper()
+        error = fx.rate_error(currency, budget.currency, day)
+        if error:
+            errors.append(error)
+
+    note = values.get('note') or ''
+    if not isinstance(note, str):
+        errors.append("note must be a string")
+
+    return {
+        'transaction_type': transaction_type,
+        'amount': amount,
+        'currency': currency,
+        'category_id': category_id,
+        'date': day,
+        'note': note.strip() if isinstance(note, str) else '',
+    }
+
+
+def _plan(user, operations, using):
+    """Validate every operation against the locked rows: [(op, instance, fields, budget_id)]"""
+    ids = [_id(operation.get('id')) for operation in operations if isinstance(operation, dict)]
+    existing = {
+        instance.pk: instance
+        for instance in Transaction.objects.using(using).select_for_update(of=('self',)).filter(
+            pk__in=[pk for pk in ids if pk is not None], monthly_budget__user=user
+        )
+    }
+    active_budget = MonthlyBudget.objects.using(using).filter(user=user, is_active=True).first()
+    budgets = MonthlyBudget.objects.using(using).in_bulk({instance.monthly_budget_id for instance in existing.values()})
+    if active_budget:
+        budgets[active_budget.pk] = active_budget
+    budget_ids = list(budgets)
+    category_budgets = dict(
+        Category.objects.using(using).filter(monthly_budget_id__in=budget_ids).values_list('pk', 'monthly_budget_id')
+    )
+
+    plans, results, seen = [], [], set()
+    for index, operation in enumerate(operations):
+        errors, instance, fields, budget_id = [], None, None, None
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op == 'create':
+            if active_budget is None:
+                errors.append("Please set up your budget first")
+            else:
+                budget_id = active_budget.pk
+                fields = _clean(operation, active_budget, category_budgets, errors)
+        elif op in ('update', 'delete'):
+            instance = existing.get(_id(operation.get('id')))
+            if instance is None:
+                errors.append("Transaction not found")
+            elif instance.pk in seen:
+                errors.append("Transaction appears more than once in the batch")
+            else:
+                seen.add(instance.pk)
+                budget_id = instance.monthly_budget_id
+                if op == 'update':
+                    changes = {name: operation[name] for name in FIELDS if name in operation}
+                    fields = _clean({**_form_values(instance), **changes}, budgets[budget_id], category_budgets, errors)
+        else:
+            errors.append("op must be 'create', 'update' or 'delete'")
+
+        plans.append((op, instance, fields, budget_id))
+        results.append({'index': index, 'op': op, 'errors': errors})
+
+    if any(result['errors'] for result in results):
+        raise BatchError(results)
+    return plans
+
+
+def apply_batch(user, operations):
+    """Validate and apply ``operations`` atomically; returns one result per operation.
+
+    Raises BatchError, having written nothing, if any operation is invalid.
+    """
+    using = router.db_for_write(Transaction)
+    with transaction.atomic(using=using):
+        plans = _plan(user, operations, using)
+
+        now = timezone.now()
+        created, updated, old_states, deleted = [], [], [], []
+        dates, category_ids = defaultdict(set), defaultdict(set)
+        for op, instance, fields, budget_id in plans:
+            if instance is not None:
+                dates[budget_id].add(instance.date)
+                category_ids[budget_id].add(instance.category_id)
+            if fields is not None:
+                dates[budget_id].add(fields['date'])
+                category_ids[budget_id].add(fields['category_id'])
+
+            if op == 'create':
+                created.append(Transaction(monthly_budget_id=budget_id, **fields))
+            elif op == 'update':
+                old_states.append(ledger.transaction_state(instance))
+                for name, value in fields.items():
+                    setattr(instance, name, value)
+                instance.updated_at = now
+                updated.append(instance)
+            else:
+                deleted.append(instance)
+
+        budgets = {budget.pk: budget for budget in MonthlyBudget.objects.using(using).filter(pk__in=list(dates))}
+        fx.convert_transactions(created + updated, {pk: budget.currency for pk, budget in budgets.items()})
+        changes = [
+            (instance.pk, old, ledger.transaction_state(instance)) for instance, old in zip(updated, old_states)
+        ]
+
+        # bulk_create/bulk_update skip save() and its signals: keep the ledger
+        # and the cached fragments' budget versions in step here
+        Transaction.objects.using(using).bulk_create(created)
+        Transaction.objects.using(using).bulk_update(updated, UPDATE_FIELDS)
+        ledger.record_created(created, using)
+        ledger.record_changes(changes, using)
+        for budget_id in {instance.monthly_budget_id for instance in created + updated}:
+            MonthlyBudget.bump_version(budget_id)
+        # Deletes go through the signals, which record them in the ledger
+        Transaction.objects.using(using).filter(pk__in=[instance.pk for instance in deleted]).delete()
+
+        for budget in budgets.values():
+            refresh_summaries(budget, dates[budget.pk], category_ids[budget.pk])
+
+    created_ids = iter(instance.pk for instance in created)
+    statuses = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+    return [
+        {
+            'index': index,
+            'op': op,
+            'id': next(created_ids) if op == 'create' else instance.pk,
+            'status': statuses[op],
+        }
+        for index, (op, instance, fields, budget_id) in enumerate(plans)
+    ]
+
+
+def find_key(user, key):
+    """The unexpired IdempotencyKey ``key`` of ``user``, or None"""
+    return IdempotencyKey.objects.filter(
+        user=user, key=key, created_at__gte=timezone.now() - KEY_LIFETIME
+    ).first()
+
+
+def save_key(user, key, request_hash, status_code, response):
+    """Store a response for replay; expired keys of the user are dropped first"""
+    IdempotencyKey.objects.filter(user=user, created_at__lt=timezone.now() - KEY_LIFETIME).delete()
+    return IdempotencyKey.objects.create(
+        user=user, key=key, request_hash=request_hash, status_code=status_code, response=response
+    )
@@ -0,0 +1,86 @@
+"""
+Conditional GET for the HTML budget pages.
+
+The dashboard, calendar, transaction list and goals pages carry an ETag and
+answer a repeat visit with 304 Not Modified while nothing they show has
+changed. The ETag is worked out before the view runs, from:
+
+* the active budget's version and updated_at. The version is bumped by
+  every transaction and category change (signals.py), by batches,
+  archiving and detect_anomalies. The budget row is then reused by the
+  view through get_active_budget().
+* its MonthlySummary.updated_at, touched by refresh_summaries() on every
+  transaction write,
+* the latest Goal.updated_at and the number of goals (so a deleted goal
+  counts too),
+* today's date (pages highlight today and spread the allowance over the
+  days left) and the CSRF cookie (a page kept across a new login must not
+  post the old token).
+
+That is two small indexed queries besides the budget lookup. There is no
+Last-Modified: a timestamp cannot tell that a goal was deleted. Responses
+are private and no-cache, so browsers keep them but always revalidate.
+Pages that list flash messages are rendered in full while any are waiting,
+because the browser's copy would not show them.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .active_budget import get_active_budget
+from .models import Goal, MonthlySummary
+
+
+def _validator(request, budget=None):
+    goals = Goal.objects.filter(user=request.user).aggregate(latest=Max('updated_at'), count=Count('pk'))
+    parts = [
+        request.user.pk,
+        timezone.localdate(),
+        request.META.get('CSRF_COOKIE', ''),
+        goals['latest'],
+        goals['count'],
+    ]
+    if budget is not None:
+        summary_updated = (
+            MonthlySummary.objects.filter(monthly_budget=budget).values_list('updated_at', flat=True).first()
+        )
+        parts += [budget.pk, budget.version, budget.updated_at, summary_updated]
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def budget_page_etag(request, *args, **kwargs):
+    """ETag for a page built from the active budget and the user's goals"""
+    budget = get_active_budget(request)
+    if budget is None:
+        return None  # the view redirects or falls back to another budget
+    return _validator(request, budget)
+
+
+def goals_page_etag(request, *args, **kwargs):
+    """ETag for a page built from the user's goals only"""
+    return _validator(request)
+
+
+def conditional_page(etag_func, shows_messages=False):
+    """Serve the view's GETs conditionally on ``etag_func``.
+
+    Pass ``shows_messages`` for pages whose template lists flash messages.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if shows_messages and len(messages.get_messages(request)):
+                return view(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,143 @@
+"""
+Foreign-currency transactions.
+
+Every budget has a currency. A transaction's ``amount`` is what was paid,
+in the transaction's ``currency``. Its ``amount_minor`` holds that amount
+converted to the budget's currency, in cents. Summaries, trends, anomalies
+and the ledger only ever read amount_minor, so they never look up a rate.
+Amounts are converted when written (Transaction.save(), batches), at the
+rate of the transaction's date.
+
+Rates are the FxRate rows loaded by `manage.py load_fx_rates`: units of each
+currency per unit of the file's base currency, one row per currency and
+day. Each process keeps them in memory as a sorted list of day ordinals
+and a parallel list of scaled integer rates per currency. A lookup is a
+bisect for the latest rate on or before the day (there are none for
+weekends and holidays), at most MAX_RATE_AGE days old. The table is
+reloaded when load_fx_rates bumps its version in the cache.
+
+convert_minor() converts a whole column at once. Rates are looked up once
+per distinct (currency, day), and the arithmetic is exact integer
+arithmetic, done on NumPy int64 arrays when NumPy is installed and the
+products fit (otherwise in Python).
+"""
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.cache import cache
+
+from .money import _numpy, to_minor
+
+DEFAULT_CURRENCY = 'USD'
+RATE_SCALE = 10 ** 8  # FxRate.rate has 8 decimal places
+MAX_RATE_AGE = 7  # days; bridges weekends and holidays, not a stale table
+VERSION_KEY = 'fx:version'
+INT64_MAX = 2 ** 63 - 1
+
+_table = None  # (version, {currency: (day ordinals, scaled rates)})
+
+
+class MissingRate(ValueError):
+    def __init__(self, currency, day):
+        super().__init__(f"No exchange rate for {currency} on {day}")
+        self.currency = currency
+        self.day = day
+
+
+def bump_fx_version():
+    """Make every process reload the rate table"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def _rates():
+    global _table
+    version = cache.get(VERSION_KEY, 0)
+    if _table is None or _table[0] != version:
+        rates = defaultdict(lambda: ([], []))
+        # Not imported at the top: models imports this module
+        rows = apps.get_model('Budgeting', 'FxRate').objects.order_by('currency', 'date')
+        for currency, day, rate in rows.values_list('currency', 'date', 'rate').iterator():
+            days, scaled = rates[currency]
+            days.append(day.toordinal())
+            scaled.append(int(rate * RATE_SCALE))
+        _table = (version, dict(rates))
+    return _table[1]
+
+
+def _rate(table, currency, day):
+    days, scaled = table.get(currency, ((), ()))
+    index = bisect_right(days, day.toordinal()) - 1
+    if index < 0 or day.toordinal() - days[index] > MAX_RATE_AGE:
+        raise MissingRate(currency, day)
+    return scaled[index]
+
+
+def known_currencies(*extra):
+    """Codes that have rates, plus ``extra`` (e.g. the budget's currency), sorted"""
+    return sorted({*_rates(), *extra})
+
+
+def convert_minor(amounts, currencies, days, target):
+    """Cents in ``target`` for cents ``amounts[i]`` in ``currencies[i]`` on ``days[i]``.
+
+    Rounds half up. Raises MissingRate when a rate is unknown.
+    """
+    if all(currency == target for currency in currencies):
+        return list(amounts)
+
+    table = _rates()
+    factors = {}  # (currency, day) -> (numerator, denominator)
+    numerators, denominators = [], []
+    for currency, day in zip(currencies, days):
+        factor = factors.get((currency, day))
+        if factor is None:
+            factor = (1, 1) if currency == target else (_rate(table, target, day), _rate(table, currency, day))
+            factors[currency, day] = factor
+        numerators.append(factor[0])
+        denominators.append(factor[1])
+
+    # amount * numerator / denominator, rounded half up: (2an + d) // 2d
+    np = _numpy()
+    if np is not None and amounts:
+        largest = max(abs(amount) for amount in amounts) * max(numerators) + max(denominators)
+        if 2 * largest <= INT64_MAX:
+            a = np.asarray(amounts, dtype=np.int64)
+            n = np.asarray(numerators, dtype=np.int64)
+            d = np.asarray(denominators, dtype=np.int64)
+            return ((2 * a * n + d) // (2 * d)).tolist()
+    return [(2 * a * n + d) // (2 * d) for a, n, d in zip(amounts, numerators, denominators)]
+
+
+def convert(amount_minor, currency, day, target):
+    """convert_minor() for one amount"""
+    return convert_minor([amount_minor], [currency], [day], target)[0]
+
+
+def rate_error(currency, target, day):
+    """Why ``currency`` cannot be converted to ``target`` on ``day``, or None"""
+    try:
+        convert(0, currency, day, target)
+    except MissingRate as error:
+        return str(error)
+    return None
+
+
+def convert_transactions(transactions, budget_currencies):
+    """Set amount_minor on transactions written without save() (bulk_create/bulk_update).
+
+    ``budget_currencies`` maps budget ids to currencies. Each currency's
+    rows are converted in one convert_minor() call.
+    """
+    by_target = defaultdict(list)
+    for instance in transactions:
+        by_target[budget_currencies[instance.monthly_budget_id]].append(instance)
+    for target, rows in by_target.items():
+        converted = convert_minor(
+            [to_minor(row.amount) for row in rows], [row.currency for row in rows], [row.date for row in rows], target
+        )
+        for row, amount_minor in zip(rows, converted):
+            row.amount_minor = amount_minor
@@ -0,0 +1,125 @@
+"""
+Whole-year spending heatmap.
+
+get_year_totals(user, year) returns the user's daily income and expense for
+a calendar year as two arrays of cents indexed by day of the year, summed
+over every budget overlapping it. They come from one grouped query over
+DailySummary. Archived budgets have handed their daily summaries to
+BudgetArchive, so their days are read from the archives instead (one more
+query, which finds nothing for years with no archived budgets).
+
+Past years are cached without expiry under a per-user version. The version
+is bumped by refresh_summaries() only when a write touches a past year, so
+browsing history costs at most one computation per year. The current year
+changes with every write and is always computed.
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .archive import archived_columns
+from .models import BudgetArchive, DailySummary
+from .money import bucket_totals, from_minor, to_minor
+
+METRICS = ('expense', 'income', 'net')
+LEVELS = 4  # shades per sign, plus 0 for days without activity
+
+
+def _version_key(user_id):
+    return f"heatmap:version:{user_id}"
+
+
+def bump_heatmap_version(user_id):
+    """Invalidate the user's cached past years"""
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _year_totals(user, year):
+    first, last = date(year, 1, 1), date(year, 12, 31)
+    keys, amounts = [], []
+
+    # Bucket 2*(day of year) holds income, 2*(day of year)+1 expense
+    rows = (
+        DailySummary.objects.filter(monthly_budget__user=user, date__range=(first, last))
+        .order_by()
+        .values_list('date')
+        .annotate(income=Sum('total_income'), expense=Sum('total_expense'))
+    )
+    for day, income, expense in rows:
+        index = 2 * (day - first).days
+        keys += [index, index + 1]
+        amounts += [to_minor(income), to_minor(expense)]
+
+    archives = BudgetArchive.objects.filter(
+        monthly_budget__user=user, monthly_budget__start_date__lte=last, monthly_budget__end_date__gte=first
+    ).only('payload')
+    for archive in archives:
+        columns = archived_columns(archive, DailySummary)
+        for day, income, expense in zip(columns['date'], columns['total_income'], columns['total_expense']):
+            day = date.fromisoformat(day)
+            if first <= day <= last:
+                index = 2 * (day - first).days
+                keys += [index, index + 1]
+                amounts += [to_minor(Decimal(income)), to_minor(Decimal(expense))]
+
+    buckets = bucket_totals(keys, amounts, 2 * ((last - first).days + 1))
+    return {'year': year, 'income': buckets[0::2], 'expense': buckets[1::2]}
+
+
+def get_year_totals(user, year):
+    """{'year', 'income', 'expense'}: cents per day of ``year`` (cached for past years)"""
+    if year >= timezone.now().year:
+        return _year_totals(user, year)
+
+    version = cache.get(_version_key(user.pk), 0)
+    key = f"heatmap:year:{user.pk}:{year}:{version}"
+    totals = cache.get(key)
+    if totals is None:
+        totals = _year_totals(user, year)
+        cache.set(key, totals, None)
+    return totals
+
+
+def _level(value, peak):
+    """0 for no activity, else 1..LEVELS by the share of the year's largest value"""
+    if not value or not peak:
+        return 0
+    return max(1, min(LEVELS, -(-abs(value) * LEVELS // peak)))
+
+
+def heatmap_weeks(totals, metric):
+    """Monday-first week columns of day cells for the template (None pads the edges)"""
+    income, expense = totals['income'], totals['expense']
+    values = [i - e for i, e in zip(income, expense)] if metric == 'net' else totals[metric]
+    peak = max((abs(value) for value in values), default=0)
+
+    first = date(totals['year'], 1, 1)
+    cells = [None] * first.weekday()
+    for index, value in enumerate(values):
+        cells.append({
+            'date': first + timedelta(days=index),
+            'income': from_minor(income[index]),
+            'expense': from_minor(expense[index]),
+            'net': from_minor(income[index] - expense[index]),
+            'level': _level(value, peak),
+            'negative': value < 0 if metric == 'net' else metric == 'expense',
+        })
+    cells += [None] * (-len(cells) % 7)
+    return [cells[start:start + 7] for start in range(0, len(cells), 7)]
+
+
+def month_labels(year):
+    """(week column, month abbreviation) for the week holding each month's first day"""
+    offset = date(year, 1, 1).weekday()
+    return [
+        ((offset + (date(year, month, 1) - date(year, 1, 1)).days) // 7, calendar.month_abbr[month])
+        for month in range(1, 13)
+    ]
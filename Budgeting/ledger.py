@@ -0,0 +1,222 @@
+"""
+Append-only ledger of transaction changes.
+
+Every create, edit and delete of a Transaction appends LedgerEntry rows,
+numbered per budget by ``sequence``. Rows are never changed afterwards; they
+go away only with their budget. Each row holds the signed change it made to
+the balance on its effective date (income positive, expense negative). Rows
+for creates and edits also hold the transaction as it stood afterwards, so
+any past state of a budget can be rebuilt for audits. An edit is written as
+a 'reverse' of the old state followed by an 'update' with the new state.
+
+BalanceSnapshot rows checkpoint the balance at the end of every
+SNAPSHOT_DAYS-day step. They are brought up to date whenever the ledger
+grows by SNAPSHOT_EVERY entries. balance_as_of() therefore reads one
+snapshot plus a bounded replay: at most SNAPSHOT_DAYS days of entries, plus
+at most SNAPSHOT_EVERY newer entries.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import Max, Q, Sum
+
+from .models import BalanceSnapshot, LedgerEntry, MonthlyBudget, Transaction
+from .money import from_minor
+
+SNAPSHOT_DAYS = 7
+SNAPSHOT_EVERY = 256
+
+
+def signed_minor(state):
+    """Effect of a transaction state on the balance, in cents"""
+    amount = state['amount_minor']
+    return amount if state['transaction_type'] == 'income' else -amount
+
+
+def _normalize(values):
+    return {
+        name: Transaction._meta.get_field(name).to_python(values[name])
+        for name in Transaction.LEDGER_FIELDS
+    }
+
+
+def transaction_state(instance):
+    """The ledger-tracked fields of a transaction, with typed values"""
+    return _normalize({name: getattr(instance, name) for name in Transaction.LEDGER_FIELDS})
+
+
+def load_state(instance, using):
+    """transaction_state() of the row as currently stored, or None"""
+    values = Transaction.objects.using(using).filter(pk=instance.pk).values(*Transaction.LEDGER_FIELDS).first()
+    return _normalize(values) if values else None
+
+
+def _payload(state):
+    return {**state, 'date': state['date'].isoformat()}
+
+
+def checkpoint_for(day):
+    """First snapshot date on or after ``day``; all budgets share one grid"""
+    return day + timedelta(days=(SNAPSHOT_DAYS - 1 - day.toordinal()) % SNAPSHOT_DAYS)
+
+
+def _append(budget_id, entries, using):
+    with transaction.atomic(using=using):
+        # Lock the budget so concurrent writers get consecutive sequence numbers
+        if MonthlyBudget.objects.using(using).select_for_update().filter(pk=budget_id).first() is None:
+            return
+        last = (
+            LedgerEntry.objects.using(using).filter(monthly_budget_id=budget_id)
+            .aggregate(last=Max('sequence'))['last'] or 0
+        )
+        for number, entry in enumerate(entries, start=last + 1):
+            entry.sequence = number
+        LedgerEntry.objects.using(using).bulk_create(entries)
+
+    if last // SNAPSHOT_EVERY != (last + len(entries)) // SNAPSHOT_EVERY:
+        refresh_snapshots(budget_id, using)
+
+
+def record_change(transaction_id, old, new, using):
+    """Append the entries for one transaction going from ``old`` to ``new``.
+
+    Either state may be None (create / delete).
+    """
+    record_changes([(transaction_id, old, new)], using)
+
+
+def record_changes(changes, using):
+    """record_change() for many (transaction_id, old, new) at once, one append per budget"""
+    entries = defaultdict(list)
+    for transaction_id, old, new in changes:
+        if old == new:
+            continue
+        if old is not None:
+            entries[old['monthly_budget_id']].append(LedgerEntry(
+                monthly_budget_id=old['monthly_budget_id'],
+                transaction_id=transaction_id,
+                action='delete' if new is None else 'reverse',
+                date=old['date'],
+                delta_minor=-signed_minor(old),
+            ))
+        if new is not None:
+            entries[new['monthly_budget_id']].append(LedgerEntry(
+                monthly_budget_id=new['monthly_budget_id'],
+                transaction_id=transaction_id,
+                action='create' if old is None else 'update',
+                date=new['date'],
+                delta_minor=signed_minor(new),
+                payload=_payload(new),
+            ))
+    for budget_id, budget_entries in entries.items():
+        _append(budget_id, budget_entries, using)
+
+
+def record_created(transactions, using=None):
+    """Ledger entries for transactions inserted with bulk_create()"""
+    entries = defaultdict(list)
+    for instance in transactions:
+        state = transaction_state(instance)
+        entries[instance.monthly_budget_id].append(LedgerEntry(
+            monthly_budget_id=instance.monthly_budget_id,
+            transaction_id=instance.pk,
+            action='create',
+            date=state['date'],
+            delta_minor=signed_minor(state),
+            payload=_payload(state),
+        ))
+    for budget_id, budget_entries in entries.items():
+        _append(budget_id, budget_entries, using or router.db_for_write(LedgerEntry))
+
+
+def refresh_snapshots(budget_id, using=None):
+    """Fold the entries appended since the last refresh into the snapshots"""
+    using = using or router.db_for_write(BalanceSnapshot)
+    with transaction.atomic(using=using):
+        previous = {
+            snapshot.as_of_date: snapshot
+            for snapshot in BalanceSnapshot.objects.using(using).filter(monthly_budget_id=budget_id)
+        }
+        since = max((snapshot.through_sequence for snapshot in previous.values()), default=0)
+        pending = LedgerEntry.objects.using(using).filter(monthly_budget_id=budget_id, sequence__gt=since)
+        through = pending.aggregate(last=Max('sequence'))['last']
+        if through is None:
+            return
+        deltas = dict(
+            pending.filter(sequence__lte=through).order_by()
+            .values_list('date').annotate(total=Sum('delta_minor'))
+        )
+
+        # Snapshots cover every grid date between the first and last entry, so
+        # a grid date missing from ``previous`` lies before all earlier entries
+        # (old balance 0) or after them (old balance = the latest snapshot).
+        days = sorted({*previous, *deltas})
+        checkpoint, last_checkpoint = checkpoint_for(days[0]), checkpoint_for(days[-1])
+        pending_days = sorted(deltas)
+        added = carried = index = 0
+        snapshots = []
+        while checkpoint <= last_checkpoint:
+            while index < len(pending_days) and pending_days[index] <= checkpoint:
+                added += deltas[pending_days[index]]
+                index += 1
+            if checkpoint in previous:
+                carried = previous[checkpoint].balance_minor
+            snapshots.append(BalanceSnapshot(
+                monthly_budget_id=budget_id,
+                as_of_date=checkpoint,
+                through_sequence=through,
+                balance_minor=carried + added,
+            ))
+            checkpoint += timedelta(days=SNAPSHOT_DAYS)
+
+        BalanceSnapshot.objects.using(using).bulk_create(
+            snapshots,
+            update_conflicts=True,
+            unique_fields=['monthly_budget', 'as_of_date'],
+            update_fields=['through_sequence', 'balance_minor'],
+        )
+
+
+def balance_minor_as_of(budget, day):
+    """Balance in cents at the end of ``day``: nearest snapshot plus a bounded replay"""
+    entries = LedgerEntry.objects.filter(monthly_budget=budget)
+    snapshot = (
+        BalanceSnapshot.objects.filter(monthly_budget=budget, as_of_date__lte=day)
+        .order_by('-as_of_date').first()
+    )
+    if snapshot is None:
+        # Before the first snapshot there are at most SNAPSHOT_DAYS days of entries
+        return entries.filter(date__lte=day).aggregate(total=Sum('delta_minor'))['total'] or 0
+
+    # Each query filters on one index only (date range / sequence range) so
+    # the planner cannot pick the other one and scan the whole ledger.
+    days_after = entries.filter(date__gt=snapshot.as_of_date, date__lte=day).aggregate(
+        total=Sum('delta_minor', filter=Q(sequence__lte=snapshot.through_sequence))
+    )['total'] or 0
+    newer = entries.filter(sequence__gt=snapshot.through_sequence).aggregate(
+        total=Sum('delta_minor', filter=Q(date__lte=day))
+    )['total'] or 0
+    return snapshot.balance_minor + days_after + newer
+
+
+def balance_as_of(budget, day):
+    return from_minor(balance_minor_as_of(budget, day))
+
+
+def reconstruct(budget, at=None, through_sequence=None):
+    """The budget's transactions as they stood at time ``at`` or after entry
+    ``through_sequence`` (default: now), as {transaction_id: state}"""
+    entries = LedgerEntry.objects.filter(monthly_budget=budget).order_by('sequence')
+    if at is not None:
+        entries = entries.filter(recorded_at__lte=at)
+    if through_sequence is not None:
+        entries = entries.filter(sequence__lte=through_sequence)
+
+    state = {}
+    for transaction_id, action, payload in entries.values_list('transaction_id', 'action', 'payload').iterator():
+        if action == 'delete':
+            state.pop(transaction_id, None)
+        elif action in ('create', 'update'):
+            state[transaction_id] = payload
+    return state
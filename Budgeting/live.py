@@ -0,0 +1,72 @@
+"""
+Deltas pushed to open dashboards (delivered by backend/events.py).
+
+    totals    {budget, total_budget, income, spent, remaining}
+    day       {budget, date, income, expense}
+    category  {budget, id, name, allocated, spent, remaining} or {budget, id, deleted}
+    goal      {id, title, target, progress, completed} or {id, deleted}
+
+Each is built from rows the write path already holds, so publishing adds
+no queries; it happens once the write commits.
+"""
+from backend.events import publish_on_commit
+
+from .models import Category, Goal, MonthlyBudget
+
+
+def publish_summaries(budget, monthly_summary, daily_summaries, category_summaries):
+    """After refresh_summaries(): the new totals, days and category rows"""
+    events = [{
+        'type': 'totals',
+        'budget': budget.pk,
+        'total_budget': budget.total_budget,
+        'income': monthly_summary.total_income,
+        'spent': monthly_summary.total_expense,
+        'remaining': monthly_summary.remaining_balance,
+    }]
+    events += [
+        {
+            'type': 'day',
+            'budget': budget.pk,
+            'date': summary.date,
+            'income': summary.total_income,
+            'expense': summary.total_expense,
+        }
+        for summary in daily_summaries
+    ]
+    events += [
+        {
+            'type': 'category',
+            'budget': budget.pk,
+            'id': category.pk,
+            'name': category.category_name,
+            'allocated': category.allocated_amount,
+            'spent': summary.total_expense,
+            'remaining': category.allocated_amount - summary.total_expense,
+        }
+        for category, summary in category_summaries
+    ]
+    publish_on_commit(budget.user_id, events, MonthlyBudget, budget)
+
+
+def publish_category(category, user_id, deleted=False):
+    event = {'type': 'category', 'budget': category.monthly_budget_id, 'id': category.pk}
+    if deleted:
+        event['deleted'] = True
+    else:
+        event.update(name=category.category_name, allocated=category.allocated_amount)
+    publish_on_commit(user_id, [event], Category, category)
+
+
+def publish_goal(goal, deleted=False):
+    event = {'type': 'goal', 'id': goal.pk}
+    if deleted:
+        event['deleted'] = True
+    else:
+        event.update(
+            title=goal.title,
+            target=goal.target_amount,
+            progress=goal.current_progress,
+            completed=goal.is_completed,
+        )
+    publish_on_commit(goal.user_id, [event], Goal, goal)
@@ -0,0 +1,94 @@
+"""Shared helpers for the benchmark commands (not a command itself)"""
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from Budgeting import ledger, money
+from Budgeting.models import Category, DailySummary, MonthlyBudget, MonthlySummary, Transaction
+
+
+@contextmanager
+def rolled_back():
+    """Run the block inside a transaction that is always rolled back"""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def seed_budget(n_transactions, seed=0):
+    """Create a throwaway user with an active budget for the current month"""
+    rng = random.Random(seed)
+    user = get_user_model().objects.create_user(
+        email=f"bench-{uuid.uuid4().hex[:12]}@example.com", name="Benchmark"
+    )
+    start = timezone.now().date().replace(day=1)
+    budget = MonthlyBudget.objects.create(
+        user=user, start_date=start, total_budget=Decimal("100000.00"), is_active=True
+    )
+    categories = Category.objects.bulk_create(
+        Category(
+            monthly_budget=budget,
+            category_name=label,
+            category_type=key,
+            allocated_amount=Decimal("10000.00"),
+        )
+        for key, label in Category.PREDEFINED_CATEGORIES
+    )
+
+    transactions = []
+    for _ in range(n_transactions):
+        transaction_type = "income" if rng.random() < 0.1 else "expense"
+        amount_minor = rng.randint(100, 500000)
+        transactions.append(
+            Transaction(
+                monthly_budget=budget,
+                category=rng.choice(categories),
+                transaction_type=transaction_type,
+                amount=money.from_minor(amount_minor),
+                amount_minor=amount_minor,
+                date=start + timedelta(days=rng.randrange(28)),
+                note=rng.choice(["groceries", "fuel", "rent", "coffee", "salary", ""]),
+            )
+        )
+    # bulk_create skips save() and signals: amount_minor is filled in above
+    # and the ledger entries are written here
+    Transaction.objects.bulk_create(transactions)
+    ledger.record_created(transactions)
+
+    for date in {t.date for t in transactions}:
+        DailySummary.update_or_create_for_date(budget, date)
+    MonthlySummary.update_or_create_for_budget(budget)
+
+    budget.refresh_from_db()
+    return user, budget
+
+
+def timed(fn):
+    """Call fn() and return (elapsed milliseconds, result)"""
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(samples):
+    """Mean / median / p95 / p99 of a list of millisecond timings"""
+    ordered = sorted(samples)
+    return {
+        "mean": statistics.fmean(ordered),
+        "p50": statistics.median(ordered),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+    }
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend.shards import shard_aliases, use_shard
+from Budgeting.archive import archive_budget
+from Budgeting.models import MonthlyBudget
+
+
+class Command(BaseCommand):
+    help = "Move inactive budgets past the retention threshold into compressed archives"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=int,
+            default=settings.BUDGET_ARCHIVE_RETENTION_DAYS,
+            help="Archive inactive budgets that ended more than this many days ago",
+        )
+        parser.add_argument("--limit", type=int, default=None, help="Archive at most this many budgets")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now().date() - timedelta(days=options["retention_days"])
+        remaining = options["limit"]
+
+        archived = rows = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                budgets = MonthlyBudget.objects.filter(
+                    is_active=False, is_archived=False, end_date__lt=cutoff
+                ).order_by("end_date")
+                if remaining is not None:
+                    budgets = budgets[:remaining]
+
+                for budget in list(budgets):
+                    if options["dry_run"]:
+                        self.stdout.write(f"Would archive budget {budget.pk} on {alias} (ended {budget.end_date})")
+                        continue
+                    # One transaction per budget so a failure never loses more than one
+                    archive = archive_budget(budget)
+                    archived += 1
+                    rows += archive.row_count
+
+                if remaining is not None:
+                    remaining -= len(budgets)
+                    if remaining <= 0:
+                        break
+
+        if not options["dry_run"]:
+            self.stdout.write(
+                self.style.SUCCESS(f"Archived {archived} budgets ({rows} rows) that ended before {cutoff}")
+            )
@@ -0,0 +1,101 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from Budgeting import ledger
+from Budgeting.models import LedgerEntry
+
+from ._bench import rolled_back, seed_budget, summarize, timed
+
+
+class Command(BaseCommand):
+    help = "Benchmark point-in-time balance queries and state reconstruction on a large ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100000)
+        parser.add_argument("--days", type=int, default=365, help="Spread entries over this many days")
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--appends", type=int, default=500, help="Single-entry appends to time")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+
+        # Everything created here is discarded when the block exits
+        with rolled_back():
+            _user, budget = seed_budget(0, seed=options["seed"])
+            start = budget.start_date - timedelta(days=options["days"])
+
+            self.stdout.write(f"Writing {options['entries']} ledger entries over {options['days']} days...")
+            elapsed, _ = timed(lambda: self._fill(budget, start, options, rng))
+            self.stdout.write(f"  bulk load + snapshots: {elapsed:.0f} ms")
+
+            entries = LedgerEntry.objects.filter(monthly_budget=budget)
+            days = [start + timedelta(days=rng.randrange(options["days"])) for _ in range(options["queries"])]
+            rows = [
+                ("snapshot + replay", lambda day: ledger.balance_minor_as_of(budget, day)),
+                ("full re-sum", lambda day: entries.filter(date__lte=day).aggregate(total=Sum("delta_minor"))["total"] or 0),
+            ]
+
+            self.stdout.write(f"{'balance as of day':<22}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}")
+            results = {}
+            for name, query in rows:
+                samples = []
+                for day in days:
+                    elapsed, value = timed(lambda: query(day))
+                    samples.append(elapsed)
+                    results.setdefault(day, set()).add(value)
+                stats = summarize(samples)
+                self.stdout.write(f"{name:<22}{stats['mean']:>9.2f}{stats['p50']:>9.2f}{stats['p95']:>9.2f}")
+            if any(len(values) > 1 for values in results.values()):
+                raise CommandError("Snapshot balances disagree with a full re-sum")
+
+            samples = []
+            for _ in range(options["appends"]):
+                state = self._state(budget, start, options["days"], rng)
+                elapsed, _ = timed(lambda: ledger.record_change(rng.randrange(10 ** 6), None, state, "default"))
+                samples.append(elapsed)
+            stats = summarize(samples)
+            self.stdout.write(f"{'append one entry':<22}{stats['mean']:>9.2f}{stats['p50']:>9.2f}{stats['p95']:>9.2f}")
+
+            last = entries.count()
+            elapsed, state = timed(lambda: ledger.reconstruct(budget, through_sequence=rng.randrange(1, last)))
+            self.stdout.write(f"reconstruct state at a random entry: {elapsed:.0f} ms ({len(state)} transactions)")
+
+    def _state(self, budget, start, days, rng):
+        return {
+            "monthly_budget_id": budget.pk,
+            "category_id": None,
+            "transaction_type": "income" if rng.random() < 0.1 else "expense",
+            "amount_minor": rng.randint(100, 50000),
+            "date": start + timedelta(days=rng.randrange(days)),
+            "note": "",
+        }
+
+    def _fill(self, budget, start, options, rng):
+        """A ledger of creates with every tenth transaction later edited"""
+        batch, sequence = [], 0
+        for transaction_id in range(1, options["entries"] + 1):
+            state = self._state(budget, start, options["days"], rng)
+            actions = [("create", state)]
+            if transaction_id % 10 == 0:
+                actions += [("reverse", state), ("update", {**state, "amount_minor": state["amount_minor"] + 1})]
+            for action, values in actions:
+                sequence += 1
+                sign = -1 if action == "reverse" else 1
+                batch.append(LedgerEntry(
+                    monthly_budget=budget,
+                    sequence=sequence,
+                    transaction_id=transaction_id,
+                    action=action,
+                    date=values["date"],
+                    delta_minor=sign * ledger.signed_minor(values),
+                    payload=None if action == "reverse" else {**values, "date": values["date"].isoformat()},
+                ))
+            if len(batch) >= 5000:
+                LedgerEntry.objects.bulk_create(batch)
+                batch = []
+        LedgerEntry.objects.bulk_create(batch)
+        ledger.refresh_snapshots(budget.pk)
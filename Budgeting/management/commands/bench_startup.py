@@ -0,0 +1,162 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter: import an entry point, serve one request, and
+# print the timings (and the wall clock at the response, which the parent
+# compares with the time it started the process).
+CHILD = r"""
+import asyncio, io, json, sys, time
+began = time.perf_counter()
+entry_point, path, host = sys.argv[1:]
+if entry_point == "wsgi":
+    from backend.wsgi import application
+else:
+    from backend.asgi import application
+imported = time.perf_counter()
+
+if entry_point == "wsgi":
+    status = []
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "", "SERVER_NAME": host,
+        "SERVER_PORT": "80", "HTTP_HOST": host, "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http",
+        "wsgi.errors": sys.stderr,
+    }
+    b"".join(application(environ, lambda line, headers, exc_info=None: status.append(int(line[:3]))))
+    status = status[0]
+else:
+    messages, requests = [], [{"type": "http.request", "body": b"", "more_body": False}]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [(b"host", host.encode())], "server": (host, 80), "client": ("127.0.0.1", 0),
+    }
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await asyncio.Future()  # the client never disconnects
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    status = next(message["status"] for message in messages if message["type"] == "http.response.start")
+responded = time.perf_counter()
+
+print(json.dumps({
+    "import": (imported - began) * 1000,
+    "request": (responded - imported) * 1000,
+    "status": status,
+    "at": time.time(),
+}))
+"""
+
+MEASURES = ("total", "import", "request")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time cold starts of the WSGI and ASGI entry points, from process start to the first "
+        "response, and compare them with a saved baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            action="append",
+            dest="profiles",
+            help="Settings module to start with; repeat to compare several "
+            "(default: backend.settings and backend.settings_production)",
+        )
+        parser.add_argument("--entry-point", choices=["wsgi", "asgi"], action="append", dest="entry_points")
+        parser.add_argument("--runs", type=int, default=10, help="Cold starts per profile and entry point")
+        parser.add_argument("--path", default="/login/", help="URL of the first request")
+        parser.add_argument("--baseline", type=Path, help="JSON file of earlier medians to compare with")
+        parser.add_argument(
+            "--save-baseline", action="store_true", help="Write this run's medians to --baseline"
+        )
+        parser.add_argument(
+            "--tolerance", type=float, default=0.15, help="Allowed slowdown over the baseline (default: 15%%)"
+        )
+
+    def handle(self, *args, **options):
+        profiles = options["profiles"] or ["backend.settings", "backend.settings_production"]
+        entry_points = options["entry_points"] or ["wsgi", "asgi"]
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline FILE")
+        host = next((host for host in settings.ALLOWED_HOSTS if host and "*" not in host), "localhost")
+        host = host.lstrip(".")
+
+        self.stdout.write(
+            f"{options['runs']} cold starts each, first request GET {options['path']} (medians, ms)"
+        )
+        self.stdout.write(f"{'profile':<32}{'entry':<7}{'total':>9}{'import':>9}{'request':>9}{'status':>8}")
+        results = {}
+        for profile in profiles:
+            for entry_point in entry_points:
+                timings = self.measure(profile, entry_point, host, options)
+                medians = {measure: statistics.median(run[measure] for run in timings) for measure in MEASURES}
+                statuses = sorted({run["status"] for run in timings})
+                results[f"{profile} {entry_point}"] = medians
+                self.stdout.write(
+                    f"{profile:<32}{entry_point:<7}{medians['total']:>9.0f}{medians['import']:>9.0f}"
+                    f"{medians['request']:>9.0f}{'/'.join(map(str, statuses)):>8}"
+                )
+                if any(status >= 500 for status in statuses):
+                    self.stderr.write(
+                        f"{profile} {entry_point}: the first request failed; with manifest static files "
+                        "run collectstatic first"
+                    )
+
+        if options["baseline"] and options["save_baseline"]:
+            options["baseline"].write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Saved baseline to {options['baseline']}"))
+        elif options["baseline"]:
+            self.compare(results, options["baseline"], options["tolerance"])
+
+    def measure(self, profile, entry_point, host, options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": profile}
+        timings = []
+        for _ in range(options["runs"]):
+            started = time.time()
+            completed = subprocess.run(
+                [sys.executable, "-c", CHILD, entry_point, options["path"], host],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode:
+                raise CommandError(f"{profile} {entry_point} did not start:\n{completed.stderr}")
+            run = json.loads(completed.stdout.strip().splitlines()[-1])
+            run["total"] = (run.pop("at") - started) * 1000
+            timings.append(run)
+        return timings
+
+    def compare(self, results, path, tolerance):
+        try:
+            baseline = json.loads(path.read_text())
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read baseline {path}: {error}")
+
+        regressions = []
+        for key, medians in results.items():
+            if key not in baseline:
+                self.stdout.write(f"{key}: not in the baseline")
+                continue
+            before, after = baseline[key]["total"], medians["total"]
+            change = after / before - 1
+            self.stdout.write(f"{key}: {before:.0f} -> {after:.0f} ms ({change:+.0%})")
+            if change > tolerance:
+                regressions.append(f"{key} is {change:.0%} slower than the baseline")
+        if regressions:
+            raise CommandError("; ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"Within {tolerance:.0%} of the baseline"))
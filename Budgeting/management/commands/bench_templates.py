@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from Budgeting import views
+from Budgeting.models import MonthlyBudget
+
+from ._bench import rolled_back, seed_budget, summarize, timed
+
+PAGES = [
+    ("dashboard.html", "/budget/dashboard/", views.dashboard),
+    ("transactions_list.html", "/budget/transactions/", views.transactions_list),
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark render time of dashboard.html and transactions_list.html"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--transactions", type=int, default=300)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        factory = RequestFactory()
+        loaders = settings.TEMPLATES[0]["OPTIONS"].get("loaders", "default")
+
+        self.stdout.write(f"Settings: {settings.SETTINGS_MODULE}  loaders: {loaders}")
+        self.stdout.write(
+            f"{'template':<24}{'cache':<7}{'mean ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}"
+        )
+
+        # Everything created here is discarded when the block exits
+        with rolled_back():
+            user, budget = seed_budget(options["transactions"])
+
+            for name, url, view in PAGES:
+                for mode in ("cold", "warm"):
+                    samples = []
+                    queries = 0
+                    for _ in range(iterations):
+                        if mode == "cold":
+                            self._invalidate_fragments(user, budget)
+                        request = factory.get(url)
+                        request.user = user
+                        connection.queries_log.clear()
+                        with CaptureQueriesContext(connection) as captured:
+                            elapsed, response = timed(lambda: view(request))
+                        samples.append(elapsed)
+                        queries = len(captured.captured_queries)
+
+                    stats = summarize(samples)
+                    self.stdout.write(
+                        f"{name:<24}{mode:<7}{stats['mean']:>9.2f}{stats['p50']:>9.2f}"
+                        f"{stats['p95']:>9.2f}{queries:>9}"
+                    )
+
+    def _invalidate_fragments(self, user, budget):
+        """Force every cached fragment for this user to be rebuilt"""
+        MonthlyBudget.bump_version(budget.budgetId)
+        cache.delete(make_template_fragment_key("dashboard_sidebar", [user.pk]))
+        for active in ("transactions", "calendar", "goals"):
+            cache.delete(make_template_fragment_key("budget_sidebar", [user.pk, active]))
@@ -0,0 +1,57 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from backend.shards import shard_aliases, use_shard
+from Budgeting.models import MonthlyBudget
+from Budgeting.reports import close_period
+
+
+def close_chunk(alias, budget_ids):
+    """One worker: build the reports of ``budget_ids`` on shard ``alias``; returns how many"""
+    try:
+        with use_shard(alias):
+            for budget in MonthlyBudget.objects.filter(pk__in=budget_ids):
+                close_period(budget)
+        return len(budget_ids)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Build the frozen reports of every ended budget period that lacks a current one (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Build reports in this many processes")
+        parser.add_argument("--chunk", type=int, default=50, help="Budgets handed to a worker at a time")
+        parser.add_argument("--rebuild", action="store_true", help="Rebuild current reports too")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        tasks = []
+        for alias in shard_aliases():
+            with use_shard(alias):
+                budgets = MonthlyBudget.objects.filter(end_date__lt=today)
+                if not options["rebuild"]:
+                    # A report is current while the budget's version has not moved
+                    budgets = budgets.exclude(report__budget_version=F("version"))
+                budget_ids = list(budgets.order_by("pk").values_list("pk", flat=True))
+            tasks += [
+                (alias, budget_ids[start:start + options["chunk"]])
+                for start in range(0, len(budget_ids), options["chunk"])
+            ]
+
+        began = time.perf_counter()
+        if options["workers"] > 1 and len(tasks) > 1:
+            connections.close_all()  # never share a connection with a forked child
+            with multiprocessing.get_context("fork").Pool(options["workers"]) as pool:
+                built = sum(pool.starmap(close_chunk, tasks))
+        else:
+            built = sum(close_chunk(alias, budget_ids) for alias, budget_ids in tasks)
+        elapsed = time.perf_counter() - began
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built} period reports in {elapsed:.1f} s"))
@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.shards import shard_aliases, use_shard
+from Budgeting.anomalies import detect_anomalies, numpy_available
+
+
+class Command(BaseCommand):
+    help = "Flag unusually high daily spending per user and category (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Last day to score, YYYY-MM-DD (default: yesterday)",
+        )
+        parser.add_argument("--days", type=int, default=1, help="Score this many days ending at --date")
+
+    def handle(self, *args, **options):
+        if not numpy_available():
+            raise CommandError("Anomaly detection needs NumPy; install it with `uv sync --group anomalies`.")
+        last = options["date"] or timezone.now().date() - timedelta(days=1)
+
+        stored = 0
+        for alias in shard_aliases():
+            with use_shard(alias):
+                for offset in range(options["days"] - 1, -1, -1):
+                    stored += detect_anomalies(last - timedelta(days=offset))
+
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} anomalies for {options['days']} day(s) through {last}"))
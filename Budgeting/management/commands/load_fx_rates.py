@@ -0,0 +1,128 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from backend.shards import shard_aliases, use_shard
+from Budgeting import ledger
+from Budgeting.fx import MissingRate, bump_fx_version, convert_transactions
+from Budgeting.models import FxRate, MonthlyBudget, Transaction
+from Budgeting.services import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Load historical exchange rates from a CSV file: a Date column, then one column per currency "
+        "holding units per one unit of the base currency (the layout of the ECB's eurofxref-hist.csv)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--base",
+            default="EUR",
+            help="Currency the file's rates are quoted against; every file loaded must use the same one",
+        )
+        parser.add_argument(
+            "--reconvert",
+            action="store_true",
+            help="Convert existing foreign-currency transactions in the file's date range again at the new rates",
+        )
+
+    def handle(self, *args, **options):
+        base = options["base"].upper()
+        rates = self._read(options["path"], base)
+        if not rates:
+            raise CommandError("No rates found")
+
+        FxRate.objects.bulk_create(
+            rates, batch_size=1000, update_conflicts=True, unique_fields=["currency", "date"], update_fields=["rate"]
+        )
+        bump_fx_version()
+        first, last = min(rate.date for rate in rates), max(rate.date for rate in rates)
+        currencies = len({rate.currency for rate in rates})
+        self.stdout.write(
+            self.style.SUCCESS(f"Loaded {len(rates)} rates for {currencies} currencies from {first} to {last}")
+        )
+
+        if options["reconvert"]:
+            changed = 0
+            for alias in shard_aliases():
+                with use_shard(alias):
+                    try:
+                        changed += self._reconvert(first, last)
+                    except MissingRate as error:
+                        raise CommandError(f"{error}; budgets converted before it are kept")
+            self.stdout.write(self.style.SUCCESS(f"Converted {changed} transactions again"))
+
+    def _read(self, path, base):
+        try:
+            with open(path, newline="") as file:
+                reader = csv.reader(file)
+                header = [name.strip().upper() for name in next(reader, [])]
+                rows = list(reader)
+        except OSError as error:
+            raise CommandError(error)
+
+        if len(header) < 2:
+            raise CommandError("Expected a Date column followed by currency columns")
+        for code in header[1:]:
+            if code and not (len(code) == 3 and code.isalpha()):
+                raise CommandError(f"Not a currency code: {code!r}")
+
+        rates = {}  # (currency, date) -> FxRate; a repeated day keeps its last row
+        for line, row in enumerate(rows, start=2):
+            if not row or not row[0].strip():
+                continue
+            try:
+                day = date.fromisoformat(row[0].strip())
+            except ValueError:
+                raise CommandError(f"Line {line}: invalid date {row[0]!r}")
+            rates[base, day] = FxRate(currency=base, date=day, rate=Decimal(1))
+            for code, value in zip(header[1:], row[1:]):
+                value = value.strip()
+                if not code or code == base or value in ("", "N/A"):
+                    continue
+                try:
+                    rate = Decimal(value)
+                except InvalidOperation:
+                    raise CommandError(f"Line {line}: invalid {code} rate {value!r}")
+                if rate <= 0:
+                    raise CommandError(f"Line {line}: {code} rate must be positive")
+                rates[code, day] = FxRate(currency=code, date=day, rate=rate)
+        return list(rates.values())
+
+    def _reconvert(self, first, last):
+        """Re-convert this shard's foreign-currency transactions dated first..last; returns how many changed"""
+        foreign = Transaction.objects.filter(date__range=(first, last)).exclude(currency=F("monthly_budget__currency"))
+        budget_ids = foreign.order_by().values_list("monthly_budget_id", flat=True).distinct()
+        changed = 0
+        for budget in MonthlyBudget.objects.filter(pk__in=list(budget_ids)):
+            using = router.db_for_write(Transaction, instance=budget)
+            # One transaction per budget, like every other write to its rows
+            with transaction.atomic(using=using):
+                rows = list(
+                    Transaction.objects.using(using).select_for_update()
+                    .filter(monthly_budget=budget, date__range=(first, last))
+                    .exclude(currency=budget.currency)
+                )
+                old = {row.pk: ledger.transaction_state(row) for row in rows}
+                convert_transactions(rows, {budget.pk: budget.currency})
+                rows = [row for row in rows if row.amount_minor != old[row.pk]["amount_minor"]]
+                if not rows:
+                    continue
+
+                now = timezone.now()
+                for row in rows:
+                    row.updated_at = now
+                Transaction.objects.using(using).bulk_update(rows, ["amount_minor", "updated_at"])
+                # bulk_update skips the signals (see batch.py)
+                ledger.record_changes([(row.pk, old[row.pk], ledger.transaction_state(row)) for row in rows], using)
+                MonthlyBudget.bump_version(budget.pk)
+                refresh_summaries(budget, {row.date for row in rows}, {row.category_id for row in rows})
+            changed += len(rows)
+        return changed
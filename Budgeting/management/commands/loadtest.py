@@ -0,0 +1,371 @@
+import http.client
+import importlib.util
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Budgeting.models import Category
+
+from ._bench import summarize
+
+# Command lines of the servers, each with one worker process
+SERVERS = {
+    # Django's threaded development server (WSGI), always available
+    "runserver": lambda port, threads: [
+        sys.executable, "manage.py", "runserver", "--noreload", "--skip-checks", f"127.0.0.1:{port}",
+    ],
+    "gunicorn": lambda port, threads: [
+        sys.executable, "-m", "gunicorn", "backend.wsgi:application", "--bind", f"127.0.0.1:{port}",
+        "--workers", "1", "--threads", str(threads),
+    ],
+    "uvicorn": lambda port, threads: [
+        sys.executable, "-m", "uvicorn", "backend.asgi:application", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", "1", "--no-access-log",
+    ],
+}
+TOKEN = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+CATEGORY_OPTION = re.compile(rb'<option value="(\d+)"')
+BUDGET_ID = re.compile(r"/budget/budget/(\d+)/categories/")
+PASSWORD = "loadtest-password"
+NOTES = ["groceries", "fuel", "rent", "coffee", "lunch", ""]
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+class Browser:
+    """One virtual user: a keep-alive connection, its cookies and the last CSRF token it was given"""
+
+    def __init__(self, port, host, samples=None):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.host = host
+        self.cookies = {}
+        self.token = ""
+        self.samples = samples  # endpoint -> [(milliseconds, ok)]; None records nothing
+
+    def request(self, endpoint, path, form=None, expect=None):
+        """GET ``path`` or, with ``form``, POST it like the page's form would; returns (response, body)"""
+        method = "GET" if form is None else "POST"
+        expect = expect or (200 if form is None else 302)  # successful form posts redirect
+        headers = {"Host": self.host}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        body = None
+        if form is not None:
+            body = urlencode({"csrfmiddlewaretoken": self.token, **form})
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            headers["Origin"] = f"http://{self.host}"
+
+        began = time.perf_counter()
+        try:
+            self.connection.request(method, path, body, headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (OSError, http.client.HTTPException) as error:
+            self.connection.close()
+            self.record(endpoint, method, began, False)
+            raise JourneyFailed(f"{method} {path}: {error}")
+        self.record(endpoint, method, began, response.status == expect)
+
+        for header in response.headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value:
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)  # deleted, e.g. the session on logout
+        match = TOKEN.search(content)
+        if match:
+            self.token = match.group(1).decode()
+        if response.status != expect:
+            raise JourneyFailed(f"{method} {path}: {response.status}, expected {expect}")
+        return response, content
+
+    def record(self, endpoint, method, began, ok):
+        if self.samples is not None:
+            self.samples[f"{endpoint} {method}"].append(((time.perf_counter() - began) * 1000, ok))
+
+    def close(self):
+        self.connection.close()
+
+
+def journey(browser, email, transactions, rng):
+    """Sign up, sign in again, set up a budget and its categories, add transactions, then look at the result"""
+    browser.request("signup", "/signup/")
+    browser.request(
+        "signup", "/signup/",
+        {"name": "Load test", "email": email, "password": PASSWORD, "confirm_password": PASSWORD},
+    )
+    browser.request("logout_view", "/logout/", expect=302)
+    browser.request("login_view", "/login/")
+    browser.request("login_view", "/login/", {"email": email, "password": PASSWORD})
+
+    browser.request("budget_setup", "/budget/budget/setup/")
+    response, _content = browser.request(
+        "budget_setup", "/budget/budget/setup/",
+        {"start_date": timezone.localdate().isoformat(), "total_budget": "3000.00", "currency": "USD"},
+    )
+    match = BUDGET_ID.search(response.getheader("Location", ""))
+    if not match:
+        raise JourneyFailed("budget_setup did not redirect to the category setup")
+    categories_path = f"/budget/budget/{match.group(1)}/categories/"
+    browser.request("category_setup", categories_path)
+    for category_type, _label in rng.sample(Category.PREDEFINED_CATEGORIES, 3):
+        browser.request(
+            "category_setup", categories_path,
+            {"action": "add_predefined", "category_type": category_type, "allocated_amount": "500.00"},
+        )
+
+    for _ in range(transactions):
+        _response, content = browser.request("add_transaction", "/budget/transactions/add/")
+        category_ids = [value.decode() for value in CATEGORY_OPTION.findall(content)]
+        if not category_ids:
+            raise JourneyFailed("add_transaction offered no categories")
+        browser.request("add_transaction", "/budget/transactions/add/", {
+            "transaction_type": "expense",
+            "amount": f"{rng.randint(100, 20000) / 100:.2f}",
+            "currency": "USD",
+            "category": rng.choice(category_ids),
+            "date": timezone.localdate().isoformat(),
+            "note": rng.choice(NOTES),
+        })
+
+    browser.request("dashboard", "/budget/dashboard/")
+    browser.request("calendar_view", "/budget/calendar/")
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the site in a local server and replay user journeys (signup, login, budget and category "
+        "setup, adding transactions, dashboard, calendar) from concurrent virtual users; reports "
+        "throughput and p50/p95/p99 latency per endpoint for each server and variant"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            choices=sorted(SERVERS),
+            action="append",
+            dest="servers",
+            help="Server to start, with one worker; repeat to compare several (default: runserver). "
+            "gunicorn serves backend.wsgi, uvicorn backend.asgi",
+        )
+        parser.add_argument(
+            "--variant",
+            action="append",
+            dest="variants",
+            metavar='"LABEL KEY=VALUE ..."',
+            help="Environment to start the server with, e.g. "
+            '"replicas DATABASE_REPLICAS=replica.sqlite3" or "production DJANGO_SETTINGS_MODULE='
+            'backend.settings_production"; repeat to compare several (default: the current environment)',
+        )
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+        parser.add_argument("--journeys", type=int, default=3, help="Journeys per virtual user")
+        parser.add_argument("--transactions", type=int, default=10, help="Transactions added per journey")
+        parser.add_argument("--warmup", type=int, default=1, help="Unrecorded journeys before each run")
+        parser.add_argument("--threads", type=int, default=8, help="Threads of the gunicorn worker")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--keep-users", action="store_true", help="Keep the users the journeys signed up"
+        )
+        parser.add_argument(
+            "--delete-users", metavar="PREFIX", help="Only delete the users whose email starts with PREFIX"
+        )
+
+    def handle(self, *args, **options):
+        if options["delete_users"]:
+            # Run in the environment of each variant, whose database may differ
+            deleted, _by_model = get_user_model().objects.filter(email__startswith=options["delete_users"]).delete()
+            self.stdout.write(f"Deleted {deleted} rows")
+            return
+
+        servers = options["servers"] or ["runserver"]
+        for server in servers:
+            if server != "runserver" and importlib.util.find_spec(server) is None:
+                raise CommandError(f"{server} is not installed (pip install {server})")
+        variants = [self.parse_variant(variant) for variant in options["variants"] or ["current"]]
+        host = next((host for host in settings.ALLOWED_HOSTS if host and "*" not in host), "localhost")
+        host = host.lstrip(".")
+
+        self.stdout.write(
+            f"{options['users']} virtual users x {options['journeys']} journeys "
+            f"of {options['transactions']} transactions"
+        )
+        results = []
+        for server in servers:
+            for label, env in variants:
+                name = f"{server} {label}"
+                prefix = f"loadtest-{uuid.uuid4().hex[:8]}-"
+                process, log = self.start(server, env, host, options)
+                try:
+                    run = self.run(process.port, host, prefix, options)
+                finally:
+                    self.stop(process, log)
+                    if not options["keep_users"]:
+                        self.delete_users(env, prefix)
+                self.report(name, run)
+                if run["failed"]:
+                    self.stderr.write(f"  server log: {log.name}")
+                else:
+                    os.unlink(log.name)
+                results.append((name, run))
+
+        if len(results) > 1:
+            self.stdout.write("")
+            self.stdout.write(f"{'server variant':<32}{'journeys/s':>12}{'req/s':>9}{'p95 ms':>9}{'errors':>8}")
+            for name, run in results:
+                timings = [ms for samples in run["samples"].values() for ms, _ok in samples]
+                self.stdout.write(
+                    f"{name:<32}{run['journeys'] / run['seconds']:>12.2f}{len(timings) / run['seconds']:>9.1f}"
+                    f"{summarize(timings)['p95'] if timings else 0:>9.0f}{run['errors']:>8}"
+                )
+        if any(run["failed"] for _name, run in results):
+            raise CommandError("Some journeys failed")
+
+    def parse_variant(self, variant):
+        label, *assignments = variant.split()
+        env = {}
+        for assignment in assignments:
+            key, separator, value = assignment.partition("=")
+            if not separator:
+                raise CommandError(f"Variant {label}: expected KEY=VALUE, got {assignment!r}")
+            env[key] = value
+        return label, env
+
+    def start(self, server, env, host, options):
+        """Start ``server`` on a free port; returns once it answers"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        log = tempfile.NamedTemporaryFile("w+", prefix=f"loadtest-{server}-", suffix=".log", delete=False)
+        process = subprocess.Popen(
+            SERVERS[server](port, options["threads"]),
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        process.port = port
+
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                log.seek(0)
+                output = log.read()
+                log.close()
+                os.unlink(log.name)
+                raise CommandError(f"{server} exited with {process.returncode}:\n{output}")
+            browser = Browser(port, host)
+            try:
+                browser.request("login_view", "/login/")
+                return process, log
+            except JourneyFailed as error:
+                if time.monotonic() > deadline:
+                    self.stop(process, log)
+                    raise CommandError(f"{server} did not answer within 30 s ({error}); log: {log.name}")
+                time.sleep(0.2)
+            finally:
+                browser.close()
+
+    def stop(self, process, log):
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        log.close()
+
+    def delete_users(self, env, prefix):
+        completed = subprocess.run(
+            [sys.executable, "manage.py", "loadtest", "--delete-users", prefix],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            self.stderr.write(f"Could not delete the users {prefix}*:\n{completed.stderr}")
+
+    def run(self, port, host, prefix, options):
+        for number in range(options["warmup"]):
+            browser = Browser(port, host)
+            try:
+                journey(browser, f"{prefix}warmup{number}@example.com", options["transactions"], random.Random(number))
+            except JourneyFailed as error:
+                raise CommandError(f"The warm-up journey failed: {error}")
+            finally:
+                browser.close()
+
+        samples = [defaultdict(list) for _ in range(options["users"])]
+        failures = [[] for _ in range(options["users"])]
+        start = threading.Barrier(options["users"] + 1)
+
+        def virtual_user(index):
+            rng = random.Random(options["seed"] * 100003 + index)
+            start.wait()
+            for number in range(options["journeys"]):
+                # A new connection per journey, like a new visit
+                browser = Browser(port, host, samples[index])
+                try:
+                    journey(browser, f"{prefix}{index}-{number}@example.com", options["transactions"], rng)
+                except JourneyFailed as error:
+                    failures[index].append(str(error))
+                finally:
+                    browser.close()
+
+        threads = [threading.Thread(target=virtual_user, args=(index,)) for index in range(options["users"])]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - began
+
+        merged = defaultdict(list)
+        for user_samples in samples:
+            for endpoint, timings in user_samples.items():
+                merged[endpoint] += timings
+        failed = [error for errors in failures for error in errors]
+        return {
+            "samples": merged,
+            "seconds": seconds,
+            "journeys": options["users"] * options["journeys"] - len(failed),
+            "failed": failed,
+            "errors": sum(not ok for timings in merged.values() for _ms, ok in timings),
+        }
+
+    def report(self, name, run):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{name}: {run['journeys']} journeys in {run['seconds']:.1f} s "
+            f"({run['journeys'] / run['seconds']:.2f} journeys/s)"
+        )
+        self.stdout.write(
+            f"{'endpoint':<24}{'requests':>9}{'errors':>8}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        )
+        for endpoint, timings in run["samples"].items():
+            stats = summarize([ms for ms, _ok in timings])
+            errors = sum(not ok for _ms, ok in timings)
+            self.stdout.write(
+                f"{endpoint:<24}{len(timings):>9}{errors:>8}{len(timings) / run['seconds']:>8.1f}"
+                f"{stats['p50']:>9.0f}{stats['p95']:>9.0f}{stats['p99']:>9.0f}"
+            )
+        for error in sorted(set(run["failed"]))[:5]:
+            self.stderr.write(f"  {error}")
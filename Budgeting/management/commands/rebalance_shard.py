@@ -0,0 +1,151 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, Max, Sum
+
+from backend.shards import (
+    DIRECTORY_CACHE_TIMEOUT, directory_cache_key, hashed_shard, shard_aliases, sharding_enabled, use_shard,
+)
+from Budgeting.archive import restore_rows
+from Budgeting.models import (
+    BalanceSnapshot, BudgetArchive, Category, CategorySummary, DailySummary, Goal, GoalContribution, IdempotencyKey,
+    LedgerEntry, MonthlyBudget, MonthlySummary, OverspendAlert, PeriodReport, ShardAssignment, SpendingAnomaly,
+    Transaction,
+)
+
+# Every sharded model, in insert order, with the lookup that scopes it to a user
+USER_ROWS = [
+    (MonthlyBudget, "user_id"),
+    (Category, "monthly_budget__user_id"),
+    (Transaction, "monthly_budget__user_id"),
+    (DailySummary, "monthly_budget__user_id"),
+    (MonthlySummary, "monthly_budget__user_id"),
+    (CategorySummary, "monthly_budget__user_id"),
+    (BudgetArchive, "monthly_budget__user_id"),
+    (PeriodReport, "monthly_budget__user_id"),
+    (LedgerEntry, "monthly_budget__user_id"),
+    (BalanceSnapshot, "monthly_budget__user_id"),
+    (SpendingAnomaly, "monthly_budget__user_id"),
+    (OverspendAlert, "monthly_budget__user_id"),
+    (Goal, "user_id"),
+    (GoalContribution, "goal__user_id"),
+    (IdempotencyKey, "user_id"),
+]
+MAX_CATCH_UP_PASSES = 5
+
+
+def _rows(model, lookup, user_id, using):
+    return model.objects.using(using).filter(**{lookup: user_id})
+
+
+def fingerprint(user_id, using):
+    """Cheap summary of a user's rows that changes on any insert, update or delete"""
+    state = []
+    for model, lookup in USER_ROWS:
+        aggregates = {"rows": Count("pk"), "last_pk": Max("pk")}
+        if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+            aggregates["last_update"] = Max("updated_at")
+        if model is MonthlyBudget:
+            aggregates["versions"] = Sum("version")
+        state.append(_rows(model, lookup, user_id, using).aggregate(**aggregates))
+    return state
+
+
+def delete_user_rows(user_id, using):
+    with use_shard(using):  # signal handlers write to the same shard
+        MonthlyBudget.objects.using(using).filter(user_id=user_id).delete()
+        Goal.objects.using(using).filter(user_id=user_id).delete()
+        IdempotencyKey.objects.using(using).filter(user_id=user_id).delete()
+
+
+def copy_user_rows(user_id, source, target):
+    """Replace the user's rows on ``target`` with a copy of those on ``source``"""
+    with transaction.atomic(using=target):
+        delete_user_rows(user_id, target)
+        for model, lookup in USER_ROWS:
+            restore_rows(model, list(_rows(model, lookup, user_id, source).order_by("pk")), target)
+
+
+class Command(BaseCommand):
+    help = "Move users' budget data between shards while the site stays online"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--user", help="Id or email of the user to move")
+        target.add_argument(
+            "--unassigned",
+            action="store_true",
+            help="Move every user without a directory entry from default to their hashed shard "
+                 "(run once after enabling sharding on an existing database)",
+        )
+        parser.add_argument("--to", dest="target", help="Destination shard (default: the user's hashed shard)")
+        parser.add_argument(
+            "--drain-seconds",
+            type=float,
+            default=DIRECTORY_CACHE_TIMEOUT,
+            help="How long writes are paused before the final copy; must cover the "
+                 "directory cache timeout when each worker has its own cache",
+        )
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Sharding is not configured; set DATABASE_SHARDS.")
+        if options["target"] and options["target"] not in shard_aliases():
+            raise CommandError(f"Unknown shard {options['target']!r}; choose from {', '.join(shard_aliases())}.")
+
+        User = get_user_model()
+        if options["unassigned"]:
+            users = User.objects.exclude(pk__in=ShardAssignment.objects.values("user_id")).values_list("pk", flat=True)
+            for user_id in users.iterator():
+                self.move(user_id, options["target"] or hashed_shard(user_id), options["drain_seconds"])
+            return
+
+        lookup = {"pk": options["user"]} if options["user"].isdigit() else {"email": options["user"]}
+        try:
+            user_id = User.objects.get(**lookup).pk
+        except User.DoesNotExist:
+            raise CommandError(f"No user matches {options['user']!r}.")
+        self.move(user_id, options["target"] or hashed_shard(user_id), options["drain_seconds"])
+
+    def move(self, user_id, target, drain_seconds):
+        # Users without a directory entry still have their rows on default
+        assignment, _created = ShardAssignment.objects.get_or_create(
+            user_id=user_id, defaults={"shard": DEFAULT_DB_ALIAS}
+        )
+        source = assignment.shard
+        if source == target:
+            self.stdout.write(f"User {user_id} is already on {target}")
+            return
+
+        # 1. Bulk copy while the user keeps working, then catch up with changes
+        copied = None
+        for _ in range(MAX_CATCH_UP_PASSES):
+            current = fingerprint(user_id, source)
+            if current == copied:
+                break
+            copy_user_rows(user_id, source, target)
+            copied = current
+
+        # 2. Pause the user's writes (ShardMiddleware answers 503) and let
+        #    requests that already resolved the old shard finish
+        assignment.is_moving = True
+        assignment.save(update_fields=["is_moving", "updated_at"])
+        cache.delete(directory_cache_key(user_id))
+        try:
+            time.sleep(drain_seconds)
+            if fingerprint(user_id, source) != copied:
+                copy_user_rows(user_id, source, target)
+
+            # 3. Flip the directory entry; new requests go to the target shard
+            assignment.shard = target
+        finally:
+            assignment.is_moving = False
+            assignment.save(update_fields=["shard", "is_moving", "updated_at"])
+            cache.delete(directory_cache_key(user_id))
+
+        # 4. Only now drop the source copy
+        delete_user_rows(user_id, source)
+        self.stdout.write(self.style.SUCCESS(f"Moved user {user_id} from {source} to {target}"))
@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from Budgeting.models import Goal
+
+
+def read_modify_write(goal_id, amount):
+    """The previous update_goal_progress: add in Python, then save"""
+    goal = Goal.objects.get(pk=goal_id)
+    goal.current_progress = goal.current_progress + amount
+    goal.save()
+    return True
+
+
+def contribute(goal_id, amount):
+    return Goal.objects.get(pk=goal_id).add_contribution(amount)
+
+
+class Command(BaseCommand):
+    help = (
+        "Add contributions to one goal from many threads at once and check that none are lost "
+        "(runs against the configured database: SQLite or PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--contributions", type=int, default=100, help="Per thread")
+        parser.add_argument("--amount", type=Decimal, default=Decimal("1.00"))
+        parser.add_argument(
+            "--skip-baseline", action="store_true", help="Do not run the old read-modify-write update for comparison"
+        )
+
+    def handle(self, *args, **options):
+        # Threads use their own connections, so the rows are committed and
+        # deleted afterwards instead of rolled back
+        user = get_user_model().objects.create_user(
+            email=f"stress-{uuid.uuid4().hex[:12]}@example.com", name="Stress test"
+        )
+        try:
+            runs = [("read-modify-write", read_modify_write), ("add_contribution", contribute)]
+            if options["skip_baseline"]:
+                runs = runs[1:]
+            self.stdout.write(
+                f"{options['threads']} threads x {options['contributions']} contributions of {options['amount']}"
+            )
+            self.stdout.write(f"{'update':<20}{'accepted':>10}{'errors':>8}{'progress':>12}{'history':>12}{'lost':>7}{'ms':>8}")
+            for name, add in runs:
+                lost = self.run(user, name, add, options)
+            if lost:
+                raise CommandError(f"add_contribution lost {lost} contributions")
+        finally:
+            user.delete()
+
+    def run(self, user, name, add, options):
+        amount = options["amount"]
+        total = options["threads"] * options["contributions"]
+        goal = Goal.objects.create(
+            user=user,
+            title=f"Stress {name}",
+            target_amount=amount * total,
+            target_date=timezone.now().date() + timedelta(days=30),
+        )
+        accepted, errors = [0] * options["threads"], [0] * options["threads"]
+        start = threading.Barrier(options["threads"])
+
+        def worker(index):
+            try:
+                start.wait()
+                for _ in range(options["contributions"]):
+                    try:
+                        accepted[index] += add(goal.pk, amount)
+                    except DatabaseError:
+                        # e.g. SQLite's busy timeout; the contribution was not made
+                        errors[index] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(options["threads"])]
+        began = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = (time.perf_counter() - began) * 1000
+
+        goal.refresh_from_db()
+        expected = amount * sum(accepted)
+        history = goal.get_contributed()
+        lost = round((expected - goal.current_progress) / amount)
+        self.stdout.write(
+            f"{name:<20}{sum(accepted):>10}{sum(errors):>8}{goal.current_progress:>12}{history:>12}{lost:>7}{elapsed:>8.0f}"
+        )
+        if add is contribute and history != goal.current_progress:
+            raise CommandError(f"Contribution history ({history}) does not match progress ({goal.current_progress})")
+        return lost
@@ -0,0 +1,192 @@
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from backend.shards import shard_for_user, use_shard
+from Budgeting import money
+from Budgeting.models import Category, CategorySummary, DailySummary, LedgerEntry, MonthlyBudget, Transaction
+
+
+def _form(rng, days, category_ids):
+    transaction_type = "income" if rng.random() < 0.2 else "expense"
+    return {
+        "transaction_type": transaction_type,
+        "amount": str(money.from_minor(rng.randint(100, 50000))),
+        "category": rng.choice(category_ids),
+        "date": rng.choice(days).isoformat(),
+        "note": "stress",
+    }
+
+
+def hammer(user_id, budget_id, options, seed):
+    """One worker: add and edit transactions through the views; returns (ok, failed)"""
+    rng = random.Random(seed)
+    client = Client()
+    client.force_login(get_user_model().objects.get(pk=user_id))
+    # Threads do not inherit the caller's use_shard(); requests find the shard themselves
+    with use_shard(shard_for_user(user_id)):
+        budget = MonthlyBudget.objects.get(pk=budget_id)
+        category_ids = list(Category.objects.filter(monthly_budget=budget).values_list("pk", flat=True))
+        transaction_ids = list(Transaction.objects.filter(monthly_budget=budget).values_list("pk", flat=True))
+    days = [budget.start_date + timedelta(days=offset) for offset in range(options["days"])]
+
+    ok = failed = 0
+    try:
+        for _ in range(options["operations"]):
+            if transaction_ids and rng.random() < options["edit_ratio"]:
+                url = f"/budget/transactions/{rng.choice(transaction_ids)}/edit/"
+            else:
+                url = "/budget/transactions/add/"
+            try:
+                response = client.post(url, _form(rng, days, category_ids))
+            except Exception:
+                failed += 1
+                continue
+            if response.status_code == 302:
+                ok += 1
+            else:
+                failed += 1
+    finally:
+        connections.close_all()
+    return ok, failed
+
+
+def recompute_errors(budget):
+    """Differences between the stored summaries and a from-scratch recompute"""
+    errors = []
+    transactions = Transaction.objects.filter(monthly_budget=budget).order_by()
+    by_day = {}
+    for date, transaction_type, total in (
+        transactions.values_list("date", "transaction_type").annotate(total=Sum("amount_minor"))
+    ):
+        by_day.setdefault(date, {"income": 0, "expense": 0})[transaction_type] = total
+
+    net = expense = 0
+    summaries = {summary.date: summary for summary in DailySummary.objects.filter(monthly_budget=budget)}
+    for date in sorted({*by_day, *summaries}):
+        expected = by_day.get(date, {"income": 0, "expense": 0})
+        net += expected["income"] - expected["expense"]
+        expense += expected["expense"]
+        summary = summaries.get(date)
+        if summary is None:
+            errors.append(f"{date}: no daily summary")
+            continue
+        stored = (
+            money.to_minor(summary.total_income), money.to_minor(summary.total_expense),
+            summary.cumulative_net_minor, summary.cumulative_expense_minor,
+        )
+        if stored != (expected["income"], expected["expense"], net, expense):
+            errors.append(f"{date}: daily summary {stored} != {(expected['income'], expected['expense'], net, expense)}")
+
+    for summary in CategorySummary.objects.filter(monthly_budget=budget).select_related("category"):
+        spent = summary.category.get_spent()
+        if summary.total_expense != spent:
+            errors.append(f"{summary.category_name}: category summary {summary.total_expense} != {spent}")
+
+    budget.summary.refresh_from_db()
+    income, spent = budget.get_totals()
+    if (budget.summary.total_income, budget.summary.total_expense) != (income, spent):
+        errors.append(
+            f"monthly summary {(budget.summary.total_income, budget.summary.total_expense)} != {(income, spent)}"
+        )
+
+    ledger_total = LedgerEntry.objects.filter(monthly_budget=budget).aggregate(total=Sum("delta_minor"))["total"] or 0
+    if ledger_total != net:
+        errors.append(f"ledger balance {ledger_total} != {net}")
+    return errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Add and edit transactions on one budget from many threads and processes at once, "
+        "then check every summary against a from-scratch recompute"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--processes", type=int, default=2, help="Forked worker processes (Unix only)")
+        parser.add_argument("--operations", type=int, default=50, help="Requests per worker")
+        parser.add_argument("--days", type=int, default=5, help="Spread transactions over this many days")
+        parser.add_argument("--edit-ratio", type=float, default=0.3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        # Workers use their own connections, so the rows are committed and
+        # deleted afterwards instead of rolled back
+        user = get_user_model().objects.create_user(
+            email=f"stress-{uuid.uuid4().hex[:12]}@example.com", name="Stress test"
+        )
+        try:
+            with use_shard(shard_for_user(user.pk)), override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+            ):
+                self.run(user, options)
+        finally:
+            user.delete()
+
+    def run(self, user, options):
+        budget = MonthlyBudget.objects.create(
+            user=user,
+            start_date=timezone.now().date() - timedelta(days=options["days"]),
+            total_budget=Decimal("100000.00"),
+            is_active=True,
+        )
+        for key, label in Category.PREDEFINED_CATEGORIES[:3]:
+            Category.objects.create(
+                monthly_budget=budget, category_name=label, category_type=key, allocated_amount=Decimal("1000.00")
+            )
+        # Something for the workers to edit
+        hammer(user.pk, budget.pk, {**options, "operations": 20, "edit_ratio": 0}, options["seed"])
+
+        workers = options["threads"] + options["processes"]
+        self.stdout.write(
+            f"{options['threads']} threads + {options['processes']} processes x {options['operations']} requests "
+            f"over {options['days']} days ({options['edit_ratio']:.0%} edits)"
+        )
+        arguments = [(user.pk, budget.pk, options, options["seed"] + 1 + index) for index in range(workers)]
+        results = [None] * options["threads"]
+
+        def thread_worker(index):
+            results[index] = hammer(*arguments[index])
+
+        began = time.perf_counter()
+        pool = None
+        if options["processes"]:
+            connections.close_all()  # never share a connection with a forked child
+            pool = multiprocessing.get_context("fork").Pool(options["processes"])
+            process_results = pool.starmap_async(hammer, arguments[options["threads"]:])
+        threads = [threading.Thread(target=thread_worker, args=(index,)) for index in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if pool is not None:
+            results += process_results.get()
+            pool.close()
+            pool.join()
+        elapsed = time.perf_counter() - began
+
+        ok = sum(result[0] for result in results)
+        failed = sum(result[1] for result in results)
+        self.stdout.write(f"{ok} requests succeeded, {failed} failed in {elapsed:.1f} s ({ok / elapsed:.0f} req/s)")
+
+        budget.refresh_from_db()
+        errors = recompute_errors(budget)
+        for error in errors:
+            self.stderr.write(error)
+        if errors or failed:
+            raise CommandError(f"{len(errors)} summary mismatches, {failed} failed requests")
+        self.stdout.write(self.style.SUCCESS("All summaries match a full recompute"))
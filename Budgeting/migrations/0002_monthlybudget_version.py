@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlybudget',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
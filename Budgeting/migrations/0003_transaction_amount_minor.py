@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:50
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def to_minor(amount):
+    """Decimal/str/int amount -> integer cents, rounding half up (frozen copy of money.to_minor)"""
+    return int(Decimal(amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def backfill_amount_minor(apps, schema_editor):
+    Transaction = apps.get_model('Budgeting', 'Transaction')
+    db_alias = schema_editor.connection.alias
+    batch = []
+    for transaction in Transaction.objects.using(db_alias).only('pk', 'amount').iterator(chunk_size=BATCH_SIZE):
+        transaction.amount_minor = to_minor(transaction.amount)
+        batch.append(transaction)
+        if len(batch) >= BATCH_SIZE:
+            Transaction.objects.using(db_alias).bulk_update(batch, ['amount_minor'])
+            batch = []
+    if batch:
+        Transaction.objects.using(db_alias).bulk_update(batch, ['amount_minor'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0002_monthlybudget_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='amount_minor',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_amount_minor, migrations.RunPython.noop),
+    ]
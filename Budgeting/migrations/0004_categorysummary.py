@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:52
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def from_minor(minor):
+    """Integer cents -> Decimal with two decimal places (frozen copy of money.from_minor)"""
+    return Decimal(int(minor)).scaleb(-2)
+
+
+def backfill_category_summaries(apps, schema_editor):
+    Category = apps.get_model('Budgeting', 'Category')
+    CategorySummary = apps.get_model('Budgeting', 'CategorySummary')
+    Transaction = apps.get_model('Budgeting', 'Transaction')
+    db_alias = schema_editor.connection.alias
+
+    spent = dict(
+        Transaction.objects.using(db_alias)
+        .filter(transaction_type='expense', category__isnull=False)
+        .order_by()
+        .values_list('category')
+        .annotate(total=Sum('amount_minor'))
+    )
+    CategorySummary.objects.using(db_alias).bulk_create(
+        [
+            CategorySummary(
+                monthly_budget_id=category.monthly_budget_id,
+                category_id=category.pk,
+                category_name=category.category_name,
+                total_expense=from_minor(spent.get(category.pk, 0)),
+            )
+            for category in Category.objects.using(db_alias).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0003_transaction_amount_minor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('summaryId', models.AutoField(primary_key=True, serialize=False)),
+                ('category_name', models.CharField(max_length=100)),
+                ('total_expense', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='summaries', to='Budgeting.category')),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_summaries', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'category_summaries',
+                'ordering': ['category_name'],
+                'unique_together': {('monthly_budget', 'category')},
+            },
+        ),
+        migrations.RunPython(backfill_category_summaries, migrations.RunPython.noop),
+    ]
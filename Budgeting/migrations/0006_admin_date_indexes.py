@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0005_transaction_note_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailysummary',
+            index=models.Index(fields=['date'], name='daily_summaries_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['monthly_budget', 'date'], name='transactions_budget_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date'], name='transactions_date'),
+        ),
+    ]
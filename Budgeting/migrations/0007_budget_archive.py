@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0006_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='monthlybudget',
+            name='is_archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='BudgetArchive',
+            fields=[
+                ('archiveId', models.AutoField(primary_key=True, serialize=False)),
+                ('payload', models.BinaryField()),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('monthly_budget', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'budget_archives',
+            },
+        ),
+    ]
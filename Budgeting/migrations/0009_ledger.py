@@ -0,0 +1,116 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:10
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+SNAPSHOT_DAYS = 7  # frozen copy of ledger.SNAPSHOT_DAYS
+
+
+def checkpoint_for(day):
+    """First snapshot date on or after ``day`` (frozen copy of ledger.checkpoint_for)"""
+    return day + timedelta(days=(SNAPSHOT_DAYS - 1 - day.toordinal()) % SNAPSHOT_DAYS)
+
+
+def backfill_ledger(apps, schema_editor):
+    """One 'create' entry per existing transaction, plus balance snapshots"""
+    Transaction = apps.get_model('Budgeting', 'Transaction')
+    LedgerEntry = apps.get_model('Budgeting', 'LedgerEntry')
+    BalanceSnapshot = apps.get_model('Budgeting', 'BalanceSnapshot')
+    db_alias = schema_editor.connection.alias
+
+    sequences, daily, entries = {}, {}, []
+    transactions = (
+        Transaction.objects.using(db_alias)
+        .order_by('monthly_budget_id', 'created_at', 'pk')
+        .values_list('pk', 'monthly_budget_id', 'category_id', 'transaction_type', 'amount_minor', 'date', 'note')
+    )
+    for pk, budget_id, category_id, transaction_type, amount_minor, date, note in transactions.iterator():
+        sequences[budget_id] = sequences.get(budget_id, 0) + 1
+        delta = amount_minor if transaction_type == 'income' else -amount_minor
+        budget_days = daily.setdefault(budget_id, {})
+        budget_days[date] = budget_days.get(date, 0) + delta
+        entries.append(LedgerEntry(
+            monthly_budget_id=budget_id,
+            sequence=sequences[budget_id],
+            transaction_id=pk,
+            action='create',
+            date=date,
+            delta_minor=delta,
+            payload={
+                'monthly_budget_id': budget_id,
+                'category_id': category_id,
+                'transaction_type': transaction_type,
+                'amount_minor': amount_minor,
+                'date': date.isoformat(),
+                'note': note,
+            },
+        ))
+        if len(entries) >= BATCH_SIZE:
+            LedgerEntry.objects.using(db_alias).bulk_create(entries)
+            entries = []
+    LedgerEntry.objects.using(db_alias).bulk_create(entries)
+
+    snapshots = []
+    for budget_id, budget_days in daily.items():
+        days = sorted(budget_days)
+        checkpoint, balance, index = checkpoint_for(days[0]), 0, 0
+        while checkpoint <= checkpoint_for(days[-1]):
+            while index < len(days) and days[index] <= checkpoint:
+                balance += budget_days[days[index]]
+                index += 1
+            snapshots.append(BalanceSnapshot(
+                monthly_budget_id=budget_id,
+                as_of_date=checkpoint,
+                through_sequence=sequences[budget_id],
+                balance_minor=balance,
+            ))
+            checkpoint += timedelta(days=SNAPSHOT_DAYS)
+    BalanceSnapshot.objects.using(db_alias).bulk_create(snapshots, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0008_user_sharding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('snapshotId', models.AutoField(primary_key=True, serialize=False)),
+                ('as_of_date', models.DateField()),
+                ('through_sequence', models.PositiveBigIntegerField()),
+                ('balance_minor', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'balance_snapshots',
+                'unique_together': {('monthly_budget', 'as_of_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('entryId', models.BigAutoField(primary_key=True, serialize=False)),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('transaction_id', models.IntegerField(db_index=True)),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('reverse', 'Reverse'), ('delete', 'Delete')], max_length=10)),
+                ('date', models.DateField()),
+                ('delta_minor', models.BigIntegerField()),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'ledger_entries',
+                'indexes': [models.Index(fields=['monthly_budget', 'date'], name='ledger_budget_date')],
+                'unique_together': {('monthly_budget', 'sequence')},
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:15
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def to_minor(amount):
+    """Decimal/str/int amount -> integer cents, rounding half up (frozen copy of money.to_minor)"""
+    return int(Decimal(amount).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP) * 100)
+
+
+def backfill_prefix_sums(apps, schema_editor):
+    """Running net and expense totals over each budget's summaries, in date order"""
+    DailySummary = apps.get_model('Budgeting', 'DailySummary')
+    db_alias = schema_editor.connection.alias
+
+    budget_id, net, expense, summaries = None, 0, 0, []
+    for summary in DailySummary.objects.using(db_alias).order_by('monthly_budget_id', 'date').iterator():
+        if summary.monthly_budget_id != budget_id:
+            budget_id, net, expense = summary.monthly_budget_id, 0, 0
+        net += to_minor(summary.net_amount)
+        expense += to_minor(summary.total_expense)
+        summary.cumulative_net_minor, summary.cumulative_expense_minor = net, expense
+        summaries.append(summary)
+        if len(summaries) >= BATCH_SIZE:
+            DailySummary.objects.using(db_alias).bulk_update(
+                summaries, ['cumulative_net_minor', 'cumulative_expense_minor']
+            )
+            summaries = []
+    DailySummary.objects.using(db_alias).bulk_update(summaries, ['cumulative_net_minor', 'cumulative_expense_minor'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0009_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysummary',
+            name='cumulative_expense_minor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailysummary',
+            name='cumulative_net_minor',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_prefix_sums, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0010_daily_summary_prefix_sums'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendingAnomaly',
+            fields=[
+                ('anomalyId', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('expected', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('score', models.FloatField()),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'spending_anomalies',
+                'ordering': ['-date', '-score'],
+                'unique_together': {('monthly_budget', 'date', 'category_name')},
+            },
+        ),
+    ]
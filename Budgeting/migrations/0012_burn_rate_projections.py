@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def seed_projections(apps, schema_editor):
+    """Start from the spend so far; the next write to a budget projects it"""
+    db_alias = schema_editor.connection.alias
+    for name in ('CategorySummary', 'MonthlySummary'):
+        apps.get_model('Budgeting', name).objects.using(db_alias).update(projected_expense=F('total_expense'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0011_spending_anomalies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categorysummary',
+            name='projected_expense',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='monthlysummary',
+            name='projected_expense',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.CreateModel(
+            name='OverspendAlert',
+            fields=[
+                ('alertId', models.AutoField(primary_key=True, serialize=False)),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('limit', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('projected_expense', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('is_open', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('monthly_budget', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overspend_alerts', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'overspend_alerts',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['monthly_budget', 'is_open'], name='overspend_alerts_open')],
+            },
+        ),
+        migrations.RunPython(seed_projections, migrations.RunPython.noop),
+    ]
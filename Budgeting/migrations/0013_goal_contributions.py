@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def opening_contributions(apps, schema_editor):
+    """One contribution per goal for the progress saved before contributions were recorded"""
+    Goal = apps.get_model('Budgeting', 'Goal')
+    GoalContribution = apps.get_model('Budgeting', 'GoalContribution')
+    db_alias = schema_editor.connection.alias
+    GoalContribution.objects.using(db_alias).bulk_create(
+        (
+            GoalContribution(goal_id=goal_id, amount=progress)
+            for goal_id, progress in Goal.objects.using(db_alias)
+            .filter(current_progress__gt=0).values_list('pk', 'current_progress').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0012_burn_rate_projections'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoalContribution',
+            fields=[
+                ('contributionId', models.AutoField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributions', to='Budgeting.goal')),
+            ],
+            options={
+                'db_table': 'goal_contributions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['goal', 'created_at'], name='goal_contributions_goal')],
+            },
+        ),
+        migrations.RunPython(opening_contributions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Budgeting', '0015_currencies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('budget_version', models.PositiveIntegerField()),
+                ('payload', models.BinaryField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('monthly_budget', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='report', to='Budgeting.monthlybudget')),
+            ],
+            options={
+                'db_table': 'period_reports',
+            },
+        ),
+    ]
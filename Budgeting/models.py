@@ -1,18 +1,25 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Case, F, Sum, Value, When
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+from .fx import DEFAULT_CURRENCY, convert
+from .money import CENT, from_minor, to_minor
 
 class MonthlyBudget(models.Model):
     """Monthly budget with start and end dates"""
     budgetId = models.AutoField(primary_key=True)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='budgets')
+    # No database constraint: with sharding, users live on another database
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='budgets', db_constraint=False)
     start_date = models.DateField()
     end_date = models.DateField()
     total_budget = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3, default=DEFAULT_CURRENCY)  # ISO 4217; transactions are converted to it
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)  # Bumped whenever the budget's data changes
+    is_archived = models.BooleanField(default=False)  # Rows moved to BudgetArchive (see archive.py)
     
     class Meta:
         db_table = 'monthly_budgets'
@@ -28,26 +35,72 @@ class MonthlyBudget(models.Model):
             self.end_date = self.start_date + timedelta(days=30)
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def bump_version(budget_id, using=None):
+        """Invalidate cached fragments built from this budget's data"""
+        MonthlyBudget.objects.db_manager(using).filter(budgetId=budget_id).update(version=models.F('version') + 1)
+    
+    def get_totals(self):
+        """Return (total_income, total_expense) from one grouped query"""
+        totals = dict(
+            self.transactions.order_by()
+            .values_list('transaction_type')
+            .annotate(total=Sum('amount_minor'))
+        )
+        return from_minor(totals.get('income', 0)), from_minor(totals.get('expense', 0))
+    
     def get_total_spent(self):
         """Calculate total expenses for this budget period"""
-        transactions = self.transactions.filter(transaction_type='expense')
-        return sum(t.amount for t in transactions)
+        return self.get_totals()[1]
     
     def get_total_income(self):
         """Calculate total income for this budget period"""
-        transactions = self.transactions.filter(transaction_type='income')
-        return sum(t.amount for t in transactions)
+        return self.get_totals()[0]
     
     def get_remaining_balance(self):
         """Calculate remaining balance"""
         return self.total_budget - self.get_total_spent()
     
+    def get_daily_allowance(self, today=None):
+        """(spendable per remaining day, still left today), or None outside the period.
+        
+        One indexed read: the latest daily summary's running expense total.
+        """
+        today = today or timezone.now().date()
+        if not self.start_date <= today <= self.end_date:
+            return None
+        latest = (
+            self.daily_summaries.filter(date__lte=today).order_by('-date')
+            .values_list('date', 'total_expense', 'cumulative_expense_minor').first()
+        )
+        spent_today = to_minor(latest[1]) if latest and latest[0] == today else 0
+        spent_before_today = (latest[2] if latest else 0) - spent_today
+        days_left = (self.end_date - today).days + 1
+        allowance = (to_minor(self.total_budget) - spent_before_today) // days_left
+        return from_minor(allowance), from_minor(allowance - spent_today)
+    
+    def project_expense(self, spent, today=None):
+        """End-of-period spend if spending continues at the rate so far"""
+        today = today or timezone.now().date()
+        if not self.start_date <= today < self.end_date:
+            return spent
+        period_days = (self.end_date - self.start_date).days + 1
+        days_elapsed = (today - self.start_date).days + 1
+        return (spent * period_days / days_elapsed).quantize(CENT)
+    
     def get_categories_summary(self):
         """Get spending summary by category"""
+        # One grouped query for every category instead of one query each
+        spent_by_category = dict(
+            self.transactions.filter(transaction_type='expense')
+            .order_by()
+            .values_list('category')
+            .annotate(total=Sum('amount_minor'))
+        )
         categories = self.categories.all()
         summary = []
         for category in categories:
-            spent = category.get_spent()
+            spent = from_minor(spent_by_category.get(category.pk, 0))
             summary.append({
                 'category': category,
                 'allocated': category.allocated_amount,
@@ -90,8 +143,10 @@ class Category(models.Model):
     
     def get_spent(self):
         """Calculate total spent in this category"""
-        transactions = self.transactions.filter(transaction_type='expense')
-        return sum(t.amount for t in transactions)
+        total = self.transactions.filter(transaction_type='expense').aggregate(
+            total=Sum('amount_minor')
+        )['total']
+        return from_minor(total or 0)
     
     def get_remaining(self):
         """Calculate remaining amount in this category"""
@@ -105,11 +160,17 @@ class Transaction(models.Model):
         ('expense', 'Expense'),
     ]
     
+    # Fields whose history is kept in the ledger
+    LEDGER_FIELDS = ('monthly_budget_id', 'category_id', 'transaction_type', 'amount_minor', 'date', 'note')
+    
     transactionId = models.AutoField(primary_key=True)
     monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='transactions')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions')
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3, default=DEFAULT_CURRENCY)  # of amount
+    # amount in the budget's currency, in cents, kept in sync by save() (see fx.py)
+    amount_minor = models.BigIntegerField(default=0, editable=False)
     date = models.DateField(default=timezone.now)
     note = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -118,9 +179,36 @@ class Transaction(models.Model):
     class Meta:
         db_table = 'transactions'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['monthly_budget', 'date'], name='transactions_budget_date'),
+            models.Index(fields=['date'], name='transactions_date'),  # admin date drilldown
+        ]
     
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.date}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the ledger compares against on the next save (see ledger.py)
+        loaded = dict(zip(field_names, values))
+        if all(name in loaded for name in cls.LEDGER_FIELDS):
+            instance._ledger_state = {name: loaded[name] for name in cls.LEDGER_FIELDS}
+        return instance
+    
+    @property
+    def budget_amount(self):
+        """The amount in the budget's currency"""
+        return from_minor(self.amount_minor)
+    
+    def save(self, *args, **kwargs):
+        # Keep the integer copy used by aggregation in sync with amount,
+        # converted at the rate of the transaction's date
+        self.amount_minor = convert(to_minor(self.amount), self.currency, self.date, self.monthly_budget.currency)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'amount', 'currency', 'date'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'amount_minor'}
+        super().save(*args, **kwargs)
 
 
 class DailySummary(models.Model):
@@ -131,6 +219,9 @@ class DailySummary(models.Model):
     total_income = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     net_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # income - expense
+    # Prefix sums in cents from the budget's first summary through this day
+    cumulative_net_minor = models.BigIntegerField(default=0)
+    cumulative_expense_minor = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -138,6 +229,9 @@ class DailySummary(models.Model):
         db_table = 'daily_summaries'
         ordering = ['-date']
         unique_together = ['monthly_budget', 'date']
+        indexes = [
+            models.Index(fields=['date'], name='daily_summaries_date'),  # admin date drilldown
+        ]
     
     def __str__(self):
         return f"{self.date} - Income: {self.total_income}, Expense: {self.total_expense}"
@@ -145,28 +239,49 @@ class DailySummary(models.Model):
     @staticmethod
     def update_or_create_for_date(monthly_budget, date):
         """Update or create daily summary for a specific date"""
-        transactions = Transaction.objects.filter(
-            monthly_budget=monthly_budget,
-            date=date
-        )
-        
-        total_income = sum(
-            t.amount for t in transactions.filter(transaction_type='income')
-        )
-        total_expense = sum(
-            t.amount for t in transactions.filter(transaction_type='expense')
-        )
-        net_amount = total_income - total_expense
-        
-        summary, created = DailySummary.objects.update_or_create(
-            monthly_budget=monthly_budget,
-            date=date,
-            defaults={
-                'total_income': total_income,
-                'total_expense': total_expense,
-                'net_amount': net_amount,
-            }
-        )
+        using = router.db_for_write(DailySummary, instance=monthly_budget)
+        summaries = DailySummary.objects.using(using).filter(monthly_budget=monthly_budget)
+        with transaction.atomic(using=using):
+            summary = summaries.select_for_update().filter(date=date).first()
+            # Totals are read under the lock so they include any writer we waited for
+            totals = dict(
+                Transaction.objects.using(using).filter(monthly_budget=monthly_budget, date=date)
+                .order_by()
+                .values_list('transaction_type')
+                .annotate(total=Sum('amount_minor'))
+            )
+            income_minor, expense_minor = totals.get('income', 0), totals.get('expense', 0)
+            if summary is None:
+                # A new day opens at the running totals of the day before it
+                previous = (
+                    summaries.filter(date__lt=date).order_by('-date')
+                    .values_list('cumulative_net_minor', 'cumulative_expense_minor').first()
+                ) or (0, 0)
+                summary = DailySummary(
+                    monthly_budget=monthly_budget,
+                    date=date,
+                    cumulative_net_minor=previous[0],
+                    cumulative_expense_minor=previous[1],
+                )
+                old_net, old_expense = 0, 0
+            else:
+                old_net, old_expense = to_minor(summary.net_amount), to_minor(summary.total_expense)
+            
+            summary.total_income = from_minor(income_minor)
+            summary.total_expense = from_minor(expense_minor)
+            summary.net_amount = from_minor(income_minor - expense_minor)
+            summary.save(using=using)
+            
+            # Range increment: this day and every later day shift by the change
+            net_change = (income_minor - expense_minor) - old_net
+            expense_change = expense_minor - old_expense
+            if net_change or expense_change:
+                summaries.filter(date__gte=date).update(
+                    cumulative_net_minor=F('cumulative_net_minor') + net_change,
+                    cumulative_expense_minor=F('cumulative_expense_minor') + expense_change,
+                )
+                summary.cumulative_net_minor += net_change
+                summary.cumulative_expense_minor += expense_change
         return summary
 
 
@@ -178,6 +293,7 @@ class MonthlySummary(models.Model):
     total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     remaining_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     savings_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)  # Percentage
+    projected_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # At the current burn rate
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -190,9 +306,8 @@ class MonthlySummary(models.Model):
     @staticmethod
     def update_or_create_for_budget(monthly_budget):
         """Update or create monthly summary for a budget"""
-        total_income = monthly_budget.get_total_income()
-        total_expense = monthly_budget.get_total_spent()
-        remaining_balance = monthly_budget.get_remaining_balance()
+        total_income, total_expense = monthly_budget.get_totals()
+        remaining_balance = monthly_budget.total_budget - total_expense
         
         # Calculate savings rate
         if monthly_budget.total_budget > 0:
@@ -207,15 +322,88 @@ class MonthlySummary(models.Model):
                 'total_expense': total_expense,
                 'remaining_balance': remaining_balance,
                 'savings_rate': savings_rate,
+                'projected_expense': monthly_budget.project_expense(total_expense),
             }
         )
         return summary
 
 
+class CategorySummary(models.Model):
+    """Expense total of one category within a budget period"""
+    summaryId = models.AutoField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='category_summaries')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='summaries')
+    # Denormalized: categories are recreated every period, so trends group by name
+    category_name = models.CharField(max_length=100)
+    total_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    projected_expense = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # At the current burn rate
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'category_summaries'
+        ordering = ['category_name']
+        unique_together = ['monthly_budget', 'category']
+    
+    def __str__(self):
+        return f"{self.category_name} - {self.total_expense}"
+    
+    @staticmethod
+    def update_or_create_for_category(category):
+        """Update or create the rollup row for a category"""
+        spent = category.get_spent()
+        summary, created = CategorySummary.objects.update_or_create(
+            monthly_budget_id=category.monthly_budget_id,
+            category=category,
+            defaults={
+                'category_name': category.category_name,
+                'total_expense': spent,
+                'projected_expense': category.monthly_budget.project_expense(spent),
+            }
+        )
+        return summary
+
+
+class OverspendAlert(models.Model):
+    """Projected end-of-period spend above a category's allocation or the total budget"""
+    alertId = models.AutoField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='overspend_alerts')
+    category_name = models.CharField(max_length=100, blank=True)  # Blank: the whole budget
+    limit = models.DecimalField(max_digits=12, decimal_places=2)
+    projected_expense = models.DecimalField(max_digits=12, decimal_places=2)
+    is_open = models.BooleanField(default=True)  # Closed when the projection falls back under the limit
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'overspend_alerts'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['monthly_budget', 'is_open'], name='overspend_alerts_open'),
+        ]
+    
+    def __str__(self):
+        return f"{self.category_name or 'Budget'}: {self.projected_expense} projected of {self.limit}"
+    
+    @staticmethod
+    def update_for(monthly_budget, category_name, projected_expense, limit):
+        """Open, refresh or close the alert for one limit after its projection changed"""
+        alerts = OverspendAlert.objects.filter(monthly_budget=monthly_budget, category_name=category_name, is_open=True)
+        if projected_expense <= limit:
+            alerts.update(is_open=False, projected_expense=projected_expense, updated_at=timezone.now())
+        elif not alerts.update(projected_expense=projected_expense, limit=limit, updated_at=timezone.now()):
+            OverspendAlert.objects.create(
+                monthly_budget=monthly_budget,
+                category_name=category_name,
+                limit=limit,
+                projected_expense=projected_expense,
+            )
+
+
 class Goal(models.Model):
     """Long-term savings goals"""
     goalId = models.AutoField(primary_key=True)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='goals')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='goals', db_constraint=False)
     title = models.CharField(max_length=200)
     target_amount = models.DecimalField(max_digits=12, decimal_places=2)
     current_progress = models.DecimalField(max_digits=12, decimal_places=2, default=0)
@@ -246,4 +434,196 @@ class Goal(models.Model):
         today = timezone.now().date()
         if self.target_date > today:
             return (self.target_date - today).days
-        return 0
\ No newline at end of file
+        return 0
+    
+    def add_contribution(self, amount):
+        """Record a contribution and add it to current_progress.
+        
+        Returns False and changes nothing if it would take the progress past
+        the target. The check and the increment are a single conditional
+        UPDATE, so concurrent contributions are never lost.
+        """
+        using = router.db_for_write(Goal, instance=self)
+        with transaction.atomic(using=using):
+            added = Goal.objects.using(using).filter(
+                pk=self.pk, current_progress__lte=F('target_amount') - amount
+            ).update(
+                current_progress=F('current_progress') + amount,
+                is_completed=Case(
+                    When(current_progress__gte=F('target_amount') - amount, then=Value(True)),
+                    default=Value(False),
+                ),
+                updated_at=timezone.now(),
+            )
+            if added:
+                GoalContribution.objects.using(using).create(goal_id=self.pk, amount=amount)
+        self.refresh_from_db(using=using, fields=['current_progress', 'is_completed', 'updated_at'])
+        return bool(added)
+    
+    def get_contributed(self):
+        """Total of the recorded contributions; equals current_progress"""
+        return self.contributions.aggregate(total=Sum('amount'))['total'] or 0
+
+
+class GoalContribution(models.Model):
+    """One amount added to a goal; the history behind Goal.current_progress"""
+    contributionId = models.AutoField(primary_key=True)
+    goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='contributions')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'goal_contributions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['goal', 'created_at'], name='goal_contributions_goal'),
+        ]
+    
+    def __str__(self):
+        return f"{self.amount} to {self.goal.title}"
+
+
+class BudgetArchive(models.Model):
+    """Compressed cold-storage copy of an inactive budget's detail rows"""
+    archiveId = models.AutoField(primary_key=True)
+    monthly_budget = models.OneToOneField(MonthlyBudget, on_delete=models.CASCADE, related_name='archive')
+    payload = models.BinaryField()  # zlib-compressed, column-oriented JSON
+    row_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'budget_archives'
+    
+    def __str__(self):
+        return f"Archive of {self.monthly_budget} ({self.row_count} rows)"
+
+
+class PeriodReport(models.Model):
+    """Frozen report of an ended budget period (see reports.py)"""
+    monthly_budget = models.OneToOneField(MonthlyBudget, on_delete=models.CASCADE, related_name='report')
+    budget_version = models.PositiveIntegerField()  # MonthlyBudget.version the report was built from
+    payload = models.BinaryField()  # gzip-compressed JSON, sent to browsers as is
+    built_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'period_reports'
+    
+    def __str__(self):
+        return f"Report of {self.monthly_budget}"
+
+
+class FxRate(models.Model):
+    """Units of ``currency`` per unit of the rate file's base currency on ``date`` (see fx.py)"""
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rate = models.DecimalField(max_digits=20, decimal_places=8)
+    
+    class Meta:
+        db_table = 'fx_rates'
+        unique_together = ['currency', 'date']
+    
+    def __str__(self):
+        return f"{self.currency} {self.rate} on {self.date}"
+
+
+class ShardAssignment(models.Model):
+    """Directory entry: which shard holds a user's budget data (see backend/shards.py)"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='shard_assignment')
+    shard = models.CharField(max_length=64)
+    is_moving = models.BooleanField(default=False)  # Writes are paused while rebalancing
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'shard_assignments'
+    
+    def __str__(self):
+        return f"{self.user} -> {self.shard}"
+
+
+class LedgerEntry(models.Model):
+    """Append-only record of one change to a budget's transactions (see ledger.py)"""
+    ACTIONS = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('reverse', 'Reverse'),  # Undoes the previous state ahead of an 'update'
+        ('delete', 'Delete'),
+    ]
+    
+    entryId = models.BigAutoField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='ledger_entries')
+    # Position in the budget's ledger; ids are not ordered once rows move between shards
+    sequence = models.PositiveBigIntegerField()
+    transaction_id = models.IntegerField(db_index=True)  # Not a key: the transaction may be gone
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    date = models.DateField()  # Day whose balance the change affects
+    delta_minor = models.BigIntegerField()  # Signed change to the balance, in cents
+    payload = models.JSONField(null=True, blank=True)  # Transaction after the change
+    recorded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'ledger_entries'
+        unique_together = ['monthly_budget', 'sequence']
+        indexes = [
+            models.Index(fields=['monthly_budget', 'date'], name='ledger_budget_date'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} #{self.transaction_id} {self.delta_minor:+} on {self.date}"
+
+
+class BalanceSnapshot(models.Model):
+    """Balance at the end of as_of_date, counting ledger entries up to through_sequence"""
+    snapshotId = models.AutoField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='balance_snapshots')
+    as_of_date = models.DateField()
+    through_sequence = models.PositiveBigIntegerField()
+    balance_minor = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'balance_snapshots'
+        unique_together = ['monthly_budget', 'as_of_date']
+    
+    def __str__(self):
+        return f"{self.monthly_budget} balance on {self.as_of_date}"
+
+
+class SpendingAnomaly(models.Model):
+    """Unusually high spending on one day, flagged by the nightly job (see anomalies.py)"""
+    anomalyId = models.AutoField(primary_key=True)
+    monthly_budget = models.ForeignKey(MonthlyBudget, on_delete=models.CASCADE, related_name='anomalies')
+    date = models.DateField()
+    # Categories are recreated every period, so anomalies key on the name;
+    # blank means the day's total spending
+    category_name = models.CharField(max_length=100, blank=True)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    expected = models.DecimalField(max_digits=12, decimal_places=2)  # Baseline for that weekday
+    score = models.FloatField()  # Robust z-score
+    detected_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'spending_anomalies'
+        ordering = ['-date', '-score']
+        # Also serves the dashboard lookup by (monthly_budget, date)
+        unique_together = ['monthly_budget', 'date', 'category_name']
+    
+    def __str__(self):
+        return f"{self.date} {self.category_name or 'Total'}: {self.amount} (expected {self.expected})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored response of a batch request, replayed when a client retries with the same key"""
+    # No database constraint: with sharding, users live on another database
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys', db_constraint=False)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)  # sha256 of the request body
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'idempotency_keys'
+        unique_together = ['user', 'key']
+    
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
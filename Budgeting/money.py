@@ -0,0 +1,47 @@
+"""
+Exact money arithmetic on integer minor units (cents).
+
+Amounts are stored as DecimalField for display and as a parallel integer
+``amount_minor`` column for computation. Bulk work goes through the
+helpers below, which use NumPy int64 arrays when NumPy is installed and
+plain Python integers otherwise. Both paths are exact.
+"""
+import functools
+from decimal import ROUND_HALF_UP, Decimal
+
+MINOR_PER_UNIT = 100
+CENT = Decimal('0.01')
+
+
+@functools.cache
+def _numpy():
+    """NumPy if installed, else None (imported on first use, not at startup)"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def to_minor(amount):
+    """Decimal/str/int amount -> integer cents, rounding half up"""
+    return int(Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP) * MINOR_PER_UNIT)
+
+
+def from_minor(minor):
+    """Integer cents -> Decimal with two decimal places"""
+    return Decimal(int(minor)).scaleb(-2)
+
+
+def bucket_totals(keys, amounts, size):
+    """Sum ``amounts`` into ``size`` buckets: result[keys[i]] += amounts[i]"""
+    np = _numpy()
+    if np is not None:
+        out = np.zeros(size, dtype=np.int64)
+        np.add.at(out, np.asarray(keys, dtype=np.intp), np.asarray(amounts, dtype=np.int64))
+        return out.tolist()
+
+    out = [0] * size
+    for key, amount in zip(keys, amounts):
+        out[key] += amount
+    return out
@@ -0,0 +1,188 @@
+"""
+Frozen reports of closed budget periods.
+
+Once a budget's end_date has passed its numbers stop changing, so its
+report is built once and stored as a PeriodReport: gzip-compressed JSON
+that the report view sends to the browser as is. The report holds:
+
+    budget      {id, start_date, end_date, currency, total_budget}
+    totals      {income, expense, net, remaining, savings_rate, transactions}
+    categories  [{name, allocated, spent, remaining, share}], biggest spend first
+    daily       {dates, income, expense, balance}, one entry per day
+    top_notes   [{note, count, total}], the TOP_NOTES notes with the most spent
+    goals       [{title, target, contributed, progress, completed}] where
+                contributed is what was added during the period and progress
+                is where the goal stood at its end
+
+It is built from the budget's transaction and category columns, read from
+the hot tables or from the budget's archive, so archived budgets keep
+their reports. Edits to an ended budget are still possible: a report
+records the MonthlyBudget.version it was built from and is rebuilt on its
+next use once the version has moved. `manage.py close_periods` builds the
+missing reports of all ended periods ahead of time.
+"""
+import gzip
+import json
+from collections import defaultdict
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import router
+from django.db.models import Sum
+from django.utils import timezone
+
+from .archive import budget_columns
+from .models import Category, Goal, GoalContribution, PeriodReport, Transaction
+from .money import bucket_totals, from_minor, to_minor
+
+REPORT_VERSION = 1
+TOP_NOTES = 10
+
+
+def is_closed(budget):
+    return budget.end_date < timezone.localdate()
+
+
+def _categories(budget, transactions, total_expense):
+    categories = budget_columns(budget, Category, ['categoryId', 'category_name', 'allocated_amount'])
+    index = {pk: position for position, pk in enumerate(categories['categoryId'])}
+    uncategorized = len(index)
+    keys, amounts = [], []
+    for kind, category_id, amount in zip(
+        transactions['transaction_type'], transactions['category_id'], transactions['amount_minor']
+    ):
+        if kind == 'expense':
+            keys.append(index.get(category_id, uncategorized))
+            amounts.append(amount)
+    spent = bucket_totals(keys, amounts, uncategorized + 1)
+
+    rows = [
+        (name, to_minor(allocated), spent[position])
+        for position, (name, allocated) in enumerate(zip(categories['category_name'], categories['allocated_amount']))
+    ]
+    if spent[uncategorized]:
+        rows.append(('Uncategorized', 0, spent[uncategorized]))
+    rows.sort(key=lambda row: -row[2])
+    return [
+        {
+            'name': name,
+            'allocated': from_minor(allocated),
+            'spent': from_minor(amount),
+            'remaining': from_minor(allocated - amount),
+            'share': round(100 * amount / total_expense, 1) if total_expense else 0,
+        }
+        for name, allocated, amount in rows
+    ]
+
+
+def _daily(budget, transactions):
+    dates = transactions['date']
+    first = min([budget.start_date, *dates])
+    last = max([budget.end_date, *dates])
+    size = (last - first).days + 1
+
+    # Bucket 2*(day index) holds income, 2*(day index)+1 expense
+    keys = [
+        2 * (day - first).days + (kind == 'expense')
+        for day, kind in zip(dates, transactions['transaction_type'])
+    ]
+    buckets = bucket_totals(keys, transactions['amount_minor'], 2 * size)
+    income, expense = buckets[0::2], buckets[1::2]
+    return {
+        'dates': [first + timedelta(days=offset) for offset in range(size)],
+        'income': [from_minor(amount) for amount in income],
+        'expense': [from_minor(amount) for amount in expense],
+        'balance': [from_minor(amount) for amount in accumulate(i - e for i, e in zip(income, expense))],
+    }
+
+
+def _top_notes(transactions):
+    notes = defaultdict(lambda: [None, 0, 0])  # key -> [note as first written, count, cents]
+    for kind, note, amount in zip(transactions['transaction_type'], transactions['note'], transactions['amount_minor']):
+        note = (note or '').strip()
+        if kind == 'expense' and note:
+            entry = notes[note.casefold()]
+            entry[0] = entry[0] or note
+            entry[1] += 1
+            entry[2] += amount
+    top = sorted(notes.values(), key=lambda entry: (-entry[2], entry[0]))[:TOP_NOTES]
+    return [{'note': note, 'count': count, 'total': from_minor(amount)} for note, count, amount in top]
+
+
+def _goals(budget):
+    """Goals that existed during the period, with what was added to them in it"""
+    contributions = GoalContribution.objects.filter(goal__user_id=budget.user_id).order_by()
+    during = dict(
+        contributions.filter(created_at__date__range=(budget.start_date, budget.end_date))
+        .values_list('goal_id').annotate(total=Sum('amount'))
+    )
+    after = dict(
+        contributions.filter(created_at__date__gt=budget.end_date)
+        .values_list('goal_id').annotate(total=Sum('amount'))
+    )
+    goals = Goal.objects.filter(user_id=budget.user_id, created_at__date__lte=budget.end_date).order_by('created_at')
+    report = []
+    for goal in goals:
+        # Sums come back from SQLite without their scale
+        progress = to_minor(goal.current_progress) - to_minor(after.get(goal.pk, 0))
+        report.append({
+            'title': goal.title,
+            'target': goal.target_amount,
+            'contributed': from_minor(to_minor(during.get(goal.pk, 0))),
+            'progress': from_minor(progress),
+            'completed': progress >= to_minor(goal.target_amount),
+        })
+    return report
+
+
+def build_report(budget):
+    """The report of ``budget`` as a dict"""
+    transactions = budget_columns(
+        budget, Transaction, ['date', 'transaction_type', 'amount_minor', 'category_id', 'note']
+    )
+    totals = {'income': 0, 'expense': 0}
+    for kind, amount in zip(transactions['transaction_type'], transactions['amount_minor']):
+        totals[kind] += amount
+    income, expense = totals['income'], totals['expense']
+    total_budget = to_minor(budget.total_budget)
+    return {
+        'version': REPORT_VERSION,
+        'budget': {
+            'id': budget.pk,
+            'start_date': budget.start_date,
+            'end_date': budget.end_date,
+            'currency': budget.currency,
+            'total_budget': budget.total_budget,
+        },
+        'totals': {
+            'income': from_minor(income),
+            'expense': from_minor(expense),
+            'net': from_minor(income - expense),
+            'remaining': from_minor(total_budget - expense),
+            'savings_rate': round(100 * (total_budget - expense) / total_budget, 1) if total_budget else 0,
+            'transactions': len(transactions['date']),
+        },
+        'categories': _categories(budget, transactions, expense),
+        'daily': _daily(budget, transactions),
+        'top_notes': _top_notes(transactions),
+        'goals': _goals(budget),
+    }
+
+
+def close_period(budget):
+    """Build and store the report of an ended ``budget``; returns the PeriodReport"""
+    version = budget.version
+    payload = gzip.compress(json.dumps(build_report(budget), cls=DjangoJSONEncoder, separators=(',', ':')).encode())
+    report, _created = PeriodReport.objects.using(router.db_for_write(PeriodReport, instance=budget)).update_or_create(
+        monthly_budget=budget, defaults={'budget_version': version, 'payload': payload}
+    )
+    return report
+
+
+def get_report(budget):
+    """The current PeriodReport of ``budget``, built if missing or stale; None while the period is open"""
+    if not is_closed(budget):
+        return None
+    report = PeriodReport.objects.filter(monthly_budget=budget, budget_version=budget.version).first()
+    return report or close_period(budget)
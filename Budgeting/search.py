@@ -0,0 +1,213 @@
+"""
+Full-text search over Transaction.note.
+
+SQLite: a contentless FTS5 table (``transactions_fts``) kept in sync by
+triggers. Each row also indexes a ``b<budgetId>`` token so a search is an
+intersection of posting lists rather than a scan of every user's matches.
+Django rebuilds ``transactions`` when fields are added on SQLite, which drops
+the triggers, so install_search_index() also runs after every migrate.
+
+PostgreSQL: a GIN index on to_tsvector('simple', note).
+
+Results are ranked and keyset-paginated on (rank, transactionId); other
+database backends fall back to an unranked icontains scan.
+"""
+import re
+
+from django.db import connections, router
+
+from .models import Transaction
+
+PAGE_SIZE = 25
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_SEARCH_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        note, budget, content='', tokenize='unicode61'
+    )
+    """,
+]
+
+SQLITE_TRIGGERS = {
+    'transactions_fts_ai': """
+        CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_fts(rowid, note, budget)
+            VALUES (new."transactionId", coalesce(new.note, ''), 'b' || new.monthly_budget_id);
+        END
+    """,
+    'transactions_fts_ad': """
+        CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, note, budget)
+            VALUES ('delete', old."transactionId", coalesce(old.note, ''), 'b' || old.monthly_budget_id);
+        END
+    """,
+    'transactions_fts_au': """
+        CREATE TRIGGER transactions_fts_au AFTER UPDATE OF note, monthly_budget_id ON transactions BEGIN
+            INSERT INTO transactions_fts(transactions_fts, rowid, note, budget)
+            VALUES ('delete', old."transactionId", coalesce(old.note, ''), 'b' || old.monthly_budget_id);
+            INSERT INTO transactions_fts(rowid, note, budget)
+            VALUES (new."transactionId", coalesce(new.note, ''), 'b' || new.monthly_budget_id);
+        END
+    """,
+}
+
+POSTGRES_SEARCH_SQL = [
+    """
+    CREATE INDEX IF NOT EXISTS transactions_note_search
+    ON transactions USING GIN (to_tsvector('simple', coalesce(note, '')))
+    """,
+]
+
+
+def install_search_index(conn):
+    """Create the text index (and on SQLite its triggers) if missing"""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for sql in SQLITE_SEARCH_SQL:
+                cursor.execute(sql)
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'transactions'"
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in SQLITE_TRIGGERS if name not in existing]
+            for name in missing:
+                cursor.execute(SQLITE_TRIGGERS[name])
+            if missing:
+                # Writes made while the triggers were absent are not indexed
+                _rebuild_sqlite_index(cursor)
+        elif conn.vendor == 'postgresql':
+            for sql in POSTGRES_SEARCH_SQL:
+                cursor.execute(sql)
+
+
+def repair_search_index(conn):
+    """Re-create SQLite triggers dropped by a table rebuild during migrate"""
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'")
+        installed = cursor.fetchone() is not None
+    if installed:
+        install_search_index(conn)
+
+
+def uninstall_search_index(conn):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute('DROP TABLE IF EXISTS transactions_fts')
+        elif conn.vendor == 'postgresql':
+            cursor.execute('DROP INDEX IF EXISTS transactions_note_search')
+
+
+def _rebuild_sqlite_index(cursor):
+    cursor.execute("INSERT INTO transactions_fts(transactions_fts) VALUES ('delete-all')")
+    cursor.execute(
+        """
+        INSERT INTO transactions_fts(rowid, note, budget)
+        SELECT "transactionId", coalesce(note, ''), 'b' || monthly_budget_id FROM transactions
+        """
+    )
+
+
+def parse_cursor(value):
+    """'rank:id' -> (rank, id); None for a missing or malformed cursor"""
+    try:
+        rank, pk = value.rsplit(':', 1)
+        return float(rank), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _format_cursor(rank, pk):
+    return f'{rank!r}:{pk}'
+
+
+def _search_sqlite(budget, tokens, filters, params, after, limit):
+    match = ' AND '.join(f'note:"{token}"*' for token in tokens) + f' AND budget:"b{budget.pk}"'
+    sql = f"""
+        SELECT id, rank FROM (
+            SELECT t."transactionId" AS id, bm25(transactions_fts) AS rank
+            FROM transactions_fts
+            JOIN transactions t ON t."transactionId" = transactions_fts.rowid
+            WHERE transactions_fts MATCH %s {filters}
+        )
+        {'WHERE rank > %s OR (rank = %s AND id > %s)' if after else ''}
+        ORDER BY rank, id
+        LIMIT %s
+    """
+    return sql, [match, *params, *((after[0], after[0], after[1]) if after else ()), limit]
+
+
+def _search_postgres(budget, tokens, filters, params, after, limit):
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    sql = f"""
+        SELECT id, rank FROM (
+            SELECT t."transactionId" AS id,
+                   -ts_rank(to_tsvector('simple', coalesce(t.note, '')), q) AS rank
+            FROM transactions t, to_tsquery('simple', %s) q
+            WHERE t.monthly_budget_id = %s
+              AND to_tsvector('simple', coalesce(t.note, '')) @@ q {filters}
+        ) ranked
+        {'WHERE rank > %s OR (rank = %s AND id > %s)' if after else ''}
+        ORDER BY rank, id
+        LIMIT %s
+    """
+    return sql, [tsquery, budget.pk, *params, *((after[0], after[0], after[1]) if after else ()), limit]
+
+
+def search_transactions(budget, query, transaction_type=None, category_id=None, after=None, limit=PAGE_SIZE):
+    """Ranked note search within one budget.
+
+    Returns (transactions, next_cursor). ``after`` is a cursor from a
+    previous page; next_cursor is None on the last page.
+    """
+    tokens = [token.lower() for token in TOKEN_RE.findall(query or '')]
+    if not tokens:
+        return [], None
+
+    filters, params = '', []
+    if transaction_type:
+        filters += ' AND t.transaction_type = %s'
+        params.append(transaction_type)
+    if category_id:
+        filters += ' AND t.category_id = %s'
+        params.append(category_id)
+    after = parse_cursor(after)
+
+    connection = connections[router.db_for_read(Transaction)]
+    if connection.vendor == 'sqlite':
+        sql, sql_params = _search_sqlite(budget, tokens, filters, params, after, limit + 1)
+    elif connection.vendor == 'postgresql':
+        sql, sql_params = _search_postgres(budget, tokens, filters, params, after, limit + 1)
+    else:
+        return _search_fallback(budget, tokens, transaction_type, category_id, after, limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, sql_params)
+        ranked = cursor.fetchall()
+
+    page, more = ranked[:limit], len(ranked) > limit
+    by_id = Transaction.objects.select_related('category').in_bulk([pk for pk, _rank in page])
+    transactions = [by_id[pk] for pk, _rank in page if pk in by_id]
+    next_cursor = _format_cursor(page[-1][1], page[-1][0]) if more else None
+    return transactions, next_cursor
+
+
+def _search_fallback(budget, tokens, transaction_type, category_id, after, limit):
+    queryset = Transaction.objects.filter(monthly_budget=budget).select_related('category')
+    for token in tokens:
+        queryset = queryset.filter(note__icontains=token)
+    if transaction_type:
+        queryset = queryset.filter(transaction_type=transaction_type)
+    if category_id:
+        queryset = queryset.filter(category_id=category_id)
+    if after:
+        queryset = queryset.filter(pk__gt=after[1])
+
+    page = list(queryset.order_by('pk')[:limit + 1])
+    more = len(page) > limit
+    page = page[:limit]
+    return page, _format_cursor(0.0, page[-1].pk) if more else None
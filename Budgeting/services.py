@@ -0,0 +1,66 @@
+"""
+Write-side helpers shared by the views.
+
+Every change to a budget's transactions goes through refresh_summaries() so
+the derived tables (daily, category and monthly summaries) stay in step.
+It runs in one transaction holding a lock on the budget row, so concurrent
+refreshes of a budget happen one after another and each one reads the
+transactions committed before it started; two writers can neither leave a
+summary missing the other's change nor race to create the same row.
+Each category and monthly summary also carries the spend projected for the
+end of the period; when a projection crosses its limit an OverspendAlert is
+opened (and closed again once it falls back), so the dashboard only reads
+alerts.
+Once the transaction commits, the budget's version is bumped so cached
+fragments built from the summaries are rebuilt, and the new totals, days
+and category rows are pushed to open dashboards (see live.py). Writes
+dated in a past year also invalidate the cached year heatmaps.
+"""
+from django.db import router, transaction
+from django.utils import timezone
+
+from .heatmap import bump_heatmap_version
+from .live import publish_summaries
+from .models import CategorySummary, DailySummary, MonthlyBudget, MonthlySummary, OverspendAlert
+
+
+def refresh_summaries(budget, dates=(), category_ids=()):
+    """Recompute the summaries touched by a change to ``budget``.
+
+    ``dates`` and ``category_ids`` are the days and categories whose
+    transactions changed (old and new values on edits). Each one is
+    recomputed once, followed by the budget's MonthlySummary. The overspend
+    alerts of those categories and of the budget are brought up to date.
+    """
+    dates = set(dates)
+    using = router.db_for_write(MonthlyBudget, instance=budget)
+    with transaction.atomic(using=using):
+        # Serializes refreshes of this budget (on SQLite the IMMEDIATE
+        # transaction mode already serializes all writers)
+        MonthlyBudget.objects.using(using).select_for_update().filter(pk=budget.pk).first()
+
+        # The version was bumped when the rows changed (signals.py), before
+        # these summaries were; bump it again once they are committed, so a
+        # fragment rendered in between from the old balances is never reused
+        transaction.on_commit(lambda: MonthlyBudget.bump_version(budget.pk, using), using=using)
+
+        if any(date.year < timezone.now().year for date in dates):
+            # After commit, so a concurrent reader cannot cache the old totals
+            # under the new version
+            transaction.on_commit(lambda: bump_heatmap_version(budget.user_id), using=using)
+
+        daily_summaries = [DailySummary.update_or_create_for_date(budget, date) for date in sorted(dates)]
+
+        category_ids = {pk for pk in category_ids if pk}
+        category_summaries = []
+        for category in budget.categories.filter(pk__in=category_ids):
+            summary = CategorySummary.update_or_create_for_category(category)
+            OverspendAlert.update_for(
+                budget, category.category_name, summary.projected_expense, category.allocated_amount
+            )
+            category_summaries.append((category, summary))
+
+        summary = MonthlySummary.update_or_create_for_budget(budget)
+        OverspendAlert.update_for(budget, '', summary.projected_expense, budget.total_budget)
+        publish_summaries(budget, summary, daily_summaries, category_summaries)
+    return summary
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from backend.shards import reserve_id_range, sharding_enabled, use_shard
+
+from .models import Category, CategorySummary, Goal, IdempotencyKey, MonthlyBudget, MonthlySummary, ShardAssignment, Transaction
+from . import ledger, live
+from .archive import is_archiving
+from .search import repair_search_index
+from .trends import bump_history_version
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_budget_version(sender, instance, **kwargs):
+    """Any change to a budget's rows makes its cached fragments stale"""
+    if is_archiving():
+        return  # archive_budget() bumps it once
+    MonthlyBudget.bump_version(instance.monthly_budget_id)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_ledger_state(sender, instance, using, raw, **kwargs):
+    """Edits of rows that were not loaded whole still need their old state"""
+    if not raw and not instance._state.adding and not hasattr(instance, '_ledger_state'):
+        instance._ledger_state = ledger.load_state(instance, using)
+
+
+@receiver(post_save, sender=Transaction)
+def record_ledger_save(sender, instance, created, using, raw, **kwargs):
+    if raw:
+        return
+    new = ledger.transaction_state(instance)
+    old = None if created else getattr(instance, '_ledger_state', None)
+    ledger.record_change(instance.pk, old, new, using)
+    instance._ledger_state = new
+
+
+@receiver(post_delete, sender=Transaction)
+def record_ledger_delete(sender, instance, using, origin=None, **kwargs):
+    # Rows removed along with their budget, or moved to its archive, take
+    # their ledger with them
+    if getattr(origin, 'model', type(origin)) is not Transaction or is_archiving():
+        return
+    old = getattr(instance, '_ledger_state', None) or ledger.transaction_state(instance)
+    ledger.record_change(instance.pk, old, None, using)
+
+
+@receiver(post_save, sender=Category)
+def publish_category_save(sender, instance, raw, **kwargs):
+    if not raw:
+        live.publish_category(instance, instance.monthly_budget.user_id)
+
+
+@receiver(post_delete, sender=Category)
+def publish_category_delete(sender, instance, origin=None, **kwargs):
+    # Categories removed along with their budget, or archived, are not shown any more
+    if getattr(origin, 'model', type(origin)) is Category and not is_archiving():
+        live.publish_category(instance, instance.monthly_budget.user_id, deleted=True)
+
+
+@receiver(post_save, sender=Goal)
+def publish_goal_save(sender, instance, raw, **kwargs):
+    # Goal.add_contribution() updates without save(); its view publishes
+    if not raw:
+        live.publish_goal(instance)
+
+
+@receiver(post_delete, sender=Goal)
+def publish_goal_delete(sender, instance, origin=None, **kwargs):
+    if getattr(origin, 'model', type(origin)) is Goal:
+        live.publish_goal(instance, deleted=True)
+
+
+@receiver(post_save, sender=MonthlySummary)
+@receiver(post_delete, sender=MonthlySummary)
+@receiver(post_save, sender=CategorySummary)
+@receiver(post_delete, sender=CategorySummary)
+def invalidate_trends_history(sender, instance, **kwargs):
+    """Cached trends only cover closed periods; the active one is read live"""
+    budget = instance.monthly_budget
+    if not budget.is_active:
+        bump_history_version(budget.user_id)
+
+
+@receiver(post_save, sender=MonthlyBudget)
+@receiver(post_delete, sender=MonthlyBudget)
+def invalidate_trends_on_budget_change(sender, instance, **kwargs):
+    """Creating, closing or deleting a period changes which periods are history"""
+    bump_history_version(instance.user_id)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    """SQLite drops triggers when migrate rebuilds the transactions table"""
+    if sender.name == 'Budgeting':
+        repair_search_index(connections[using])
+
+
+@receiver(post_migrate)
+def reserve_shard_ids(sender, using, **kwargs):
+    """Give each shard its own primary key range so rows can move between shards"""
+    if sender.name == 'Budgeting':
+        reserve_id_range(connections[using])
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def delete_sharded_rows(sender, instance, **kwargs):
+    """Cascades cannot cross databases; clear the user's rows on their shard"""
+    assignment = ShardAssignment.objects.filter(user_id=instance.pk).first() if sharding_enabled() else None
+    if assignment is not None:
+        with use_shard(assignment.shard):
+            MonthlyBudget.objects.filter(user_id=instance.pk).delete()
+            Goal.objects.filter(user_id=instance.pk).delete()
+            IdempotencyKey.objects.filter(user_id=instance.pk).delete()
@@ -1,3 +1,117 @@
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-# Create your tests here.
+from . import fx, ledger
+from .models import FxRate, MonthlyBudget, MonthlySummary, Transaction
+from .money import _numpy
+
+FRIDAY = date(2026, 10, 16)
+
+
+class FxTestCase(TestCase):
+    """Rates quoted per euro, loaded for FRIDAY only unless a test adds more"""
+
+    rates = {'EUR': '1', 'USD': '1.5', 'JPY': '163.25'}
+
+    @classmethod
+    def setUpTestData(cls):
+        FxRate.objects.bulk_create(
+            FxRate(currency=currency, date=FRIDAY, rate=Decimal(rate)) for currency, rate in cls.rates.items()
+        )
+
+    def setUp(self):
+        fx.bump_fx_version()  # drop the rate table another test loaded
+
+
+class ConvertTests(FxTestCase):
+    def test_rounds_half_up(self):
+        # 1 and 3 cents at 1.5 are 1.5 and 4.5 cents
+        self.assertEqual(fx.convert(1, 'EUR', FRIDAY, 'USD'), 2)
+        self.assertEqual(fx.convert(3, 'EUR', FRIDAY, 'USD'), 5)
+        self.assertEqual(fx.convert(1000, 'EUR', FRIDAY, 'USD'), 1500)
+        # 1 cent / 1.5 is 0.67 cents
+        self.assertEqual(fx.convert(1, 'USD', FRIDAY, 'EUR'), 1)
+
+    def test_matches_decimal_rounding(self):
+        rate = Decimal('1.5') / Decimal('163.25')
+        for amount in range(0, 20000, 7):
+            expected = (Decimal(amount) * rate).quantize(Decimal('1'), rounding=ROUND_HALF_UP)
+            self.assertEqual(fx.convert(amount, 'JPY', FRIDAY, 'USD'), int(expected), amount)
+
+    def test_same_currency_needs_no_rate(self):
+        self.assertEqual(fx.convert_minor([123, 456], ['GBP', 'GBP'], [FRIDAY, FRIDAY], 'GBP'), [123, 456])
+
+    def test_weekend_uses_the_last_rate(self):
+        for day in (FRIDAY + timedelta(days=1), FRIDAY + timedelta(days=2), FRIDAY + timedelta(days=3)):
+            self.assertEqual(fx.convert(1000, 'EUR', day, 'USD'), 1500, day)
+
+    def test_rate_older_than_max_age_is_missing(self):
+        self.assertEqual(fx.convert(1000, 'EUR', FRIDAY + timedelta(days=fx.MAX_RATE_AGE), 'USD'), 1500)
+        with self.assertRaises(fx.MissingRate):
+            fx.convert(1000, 'EUR', FRIDAY + timedelta(days=fx.MAX_RATE_AGE + 1), 'USD')
+
+    def test_no_rate_before_the_first_or_for_unknown_currencies(self):
+        with self.assertRaises(fx.MissingRate):
+            fx.convert(1000, 'EUR', FRIDAY - timedelta(days=1), 'USD')
+        with self.assertRaises(fx.MissingRate):
+            fx.convert(1000, 'GBP', FRIDAY, 'USD')
+        self.assertEqual(fx.rate_error('GBP', 'USD', FRIDAY), f"No exchange rate for GBP on {FRIDAY}")
+
+    def test_new_rates_are_picked_up_after_a_version_bump(self):
+        fx.convert(1000, 'EUR', FRIDAY, 'USD')  # loads the table
+        FxRate.objects.filter(currency='USD').update(rate=Decimal('2'))
+        fx.bump_fx_version()
+        self.assertEqual(fx.convert(1000, 'EUR', FRIDAY, 'USD'), 2000)
+
+    @skipUnless(_numpy(), "NumPy is not installed")
+    def test_numpy_and_python_agree(self):
+        rng = random.Random(0)
+        currencies = list(self.rates)
+        amounts = [rng.randint(0, 10 ** 9) for _ in range(2000)]
+        sources = [rng.choice(currencies) for _ in amounts]
+        days = [FRIDAY + timedelta(days=rng.randrange(fx.MAX_RATE_AGE + 1)) for _ in amounts]
+        for target in currencies:
+            vectorized = fx.convert_minor(amounts, sources, days, target)
+            with mock.patch('Budgeting.fx._numpy', return_value=None):
+                pure = fx.convert_minor(amounts, sources, days, target)
+            self.assertEqual(vectorized, pure, target)
+
+
+class ReconvertTests(FxTestCase):
+    rates = {'EUR': '1', 'USD': '1.10'}
+
+    def test_reconvert_updates_ledger_and_summaries(self):
+        user = get_user_model().objects.create_user(email='fx@example.com', name='FX')
+        budget = MonthlyBudget.objects.create(
+            user=user, start_date=FRIDAY - timedelta(days=5), total_budget=Decimal('100.00'), currency='USD'
+        )
+        spent = Transaction.objects.create(
+            monthly_budget=budget, transaction_type='expense', amount=Decimal('10.00'), currency='EUR', date=FRIDAY
+        )
+        local = Transaction.objects.create(
+            monthly_budget=budget, transaction_type='expense', amount=Decimal('1.00'), currency='USD', date=FRIDAY
+        )
+        self.assertEqual(spent.amount_minor, 1100)
+        version = MonthlyBudget.objects.get(pk=budget.pk).version
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as rates:
+            rates.write(f"Date,USD,\n{FRIDAY},1.2,\n")
+            rates.flush()
+            call_command('load_fx_rates', rates.name, '--reconvert', stdout=StringIO())
+
+        spent.refresh_from_db()
+        local.refresh_from_db()
+        self.assertEqual(spent.amount_minor, 1200)
+        self.assertEqual(local.amount_minor, 100)
+        self.assertEqual(MonthlySummary.objects.get(monthly_budget=budget).total_expense, Decimal('13.00'))
+        self.assertEqual(ledger.balance_minor_as_of(budget, FRIDAY), -1300)
+        self.assertEqual(ledger.reconstruct(budget)[spent.pk]['amount_minor'], 1200)
+        self.assertGreater(MonthlyBudget.objects.get(pk=budget.pk).version, version)
@@ -0,0 +1,186 @@
+"""
+Multi-period trends built from MonthlySummary and CategorySummary.
+
+Closed periods never change once a newer budget is active, so their
+window-function results are cached per user under a history version that is
+bumped only when a historical summary changes (see Budgeting.signals). The
+active period is appended on every request from two indexed lookups, which
+keeps the cost independent of how many years of history a user has.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, F, Sum, Window
+from django.db.models.functions import Lag
+from django.db.models.expressions import RowRange
+
+from .active_budget import active_budget_for
+from .models import CategorySummary, MonthlyBudget, MonthlySummary
+
+ROLLING_WINDOW = 3  # periods in the rolling average
+MAX_PERIODS = 60
+TWO_PLACES = Decimal('0.01')
+
+
+def _history_version_key(user_id):
+    return f"trends:version:{user_id}"
+
+
+def bump_history_version(user_id):
+    """Invalidate every cached trends result for a user"""
+    key = _history_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _round(value):
+    return None if value is None else Decimal(value).quantize(TWO_PLACES)
+
+
+def _percent_change(current, previous):
+    if previous is None or previous == 0:
+        return None
+    return _round((current - previous) / previous * 100)
+
+
+def _period_rows(budget_ids):
+    """Period totals with period-over-period change and rolling averages"""
+    order = F('monthly_budget__start_date').asc()
+    rows = (
+        MonthlySummary.objects.filter(monthly_budget_id__in=budget_ids)
+        .annotate(
+            start_date=F('monthly_budget__start_date'),
+            end_date=F('monthly_budget__end_date'),
+            total_budget=F('monthly_budget__total_budget'),
+            previous_expense=Window(Lag('total_expense'), order_by=order),
+            previous_income=Window(Lag('total_income'), order_by=order),
+            rolling_expense=Window(
+                Avg('total_expense'), order_by=order,
+                frame=RowRange(start=-(ROLLING_WINDOW - 1), end=0),
+            ),
+        )
+        .order_by('monthly_budget__start_date')
+        .values(
+            'monthly_budget_id', 'start_date', 'end_date', 'total_budget',
+            'total_income', 'total_expense', 'savings_rate',
+            'previous_expense', 'previous_income', 'rolling_expense',
+        )
+    )
+    return [
+        {
+            **row,
+            'rolling_expense': _round(row['rolling_expense']),
+            'expense_change': _percent_change(row['total_expense'], row['previous_expense']),
+            'income_change': _percent_change(row['total_income'], row['previous_income']),
+        }
+        for row in rows
+    ]
+
+
+def _category_rows(budget_ids):
+    """Per-category spend, share of its period and change vs. the previous period"""
+    by_name = F('monthly_budget__start_date').asc()
+    rows = (
+        CategorySummary.objects.filter(monthly_budget_id__in=budget_ids)
+        .annotate(
+            start_date=F('monthly_budget__start_date'),
+            period_expense=Window(Sum('total_expense'), partition_by=[F('monthly_budget_id')]),
+            previous_expense=Window(
+                Lag('total_expense'), partition_by=[F('category_name')], order_by=by_name,
+            ),
+            rolling_expense=Window(
+                Avg('total_expense'), partition_by=[F('category_name')], order_by=by_name,
+                frame=RowRange(start=-(ROLLING_WINDOW - 1), end=0),
+            ),
+        )
+        .order_by('category_name', 'monthly_budget__start_date')
+        .values(
+            'monthly_budget_id', 'category_name', 'start_date', 'total_expense',
+            'period_expense', 'previous_expense', 'rolling_expense',
+        )
+    )
+    return [
+        {
+            **row,
+            'rolling_expense': _round(row['rolling_expense']),
+            'share': _round(row['total_expense'] / row['period_expense'] * 100) if row['period_expense'] else None,
+            'expense_change': _percent_change(row['total_expense'], row['previous_expense']),
+        }
+        for row in rows
+    ]
+
+
+def get_history(user, periods):
+    """Window-function rows for the user's last ``periods`` closed budgets (cached)"""
+    version = cache.get(_history_version_key(user.pk), 0)
+    key = f"trends:history:{user.pk}:{periods}:{version}"
+    history = cache.get(key)
+    if history is None:
+        budget_ids = list(
+            MonthlyBudget.objects.filter(user=user, is_active=False)
+            .order_by('-start_date')
+            .values_list('budgetId', flat=True)[:periods]
+        )
+        history = {
+            'periods': _period_rows(budget_ids),
+            'categories': _category_rows(budget_ids),
+        }
+        cache.set(key, history, None)
+    return history
+
+
+def _append_current(history_rows, current, key=None):
+    """Derive the active period's change and rolling average from cached history"""
+    previous = [row for row in history_rows if key is None or row[key] == current[key]]
+    last = previous[-1] if previous else None
+    current['previous_expense'] = last['total_expense'] if last else None
+    current['expense_change'] = _percent_change(current['total_expense'], current['previous_expense'])
+    window = [row['total_expense'] for row in previous[-(ROLLING_WINDOW - 1):]] + [current['total_expense']]
+    current['rolling_expense'] = _round(sum(window, Decimal(0)) / len(window))
+    return current
+
+
+def get_trends(user, periods=12):
+    """Closed periods from the cache plus the live active period"""
+    periods = max(1, min(int(periods), MAX_PERIODS))
+    active = active_budget_for(user)
+    history = get_history(user, periods - 1 if active else periods)
+
+    period_rows = list(history['periods'])
+    category_rows = list(history['categories'])
+
+    summary = MonthlySummary.objects.filter(monthly_budget=active).first() if active else None
+    if summary:
+        current = _append_current(period_rows, {
+            'monthly_budget_id': active.budgetId,
+            'start_date': active.start_date,
+            'end_date': active.end_date,
+            'total_budget': active.total_budget,
+            'total_income': summary.total_income,
+            'total_expense': summary.total_expense,
+            'savings_rate': summary.savings_rate,
+        })
+        previous_income = period_rows[-1]['total_income'] if period_rows else None
+        current['previous_income'] = previous_income
+        current['income_change'] = _percent_change(summary.total_income, previous_income)
+        period_rows.append(current)
+
+        current_categories = CategorySummary.objects.filter(monthly_budget=active)
+        for category in current_categories:
+            row = _append_current(category_rows, {
+                'monthly_budget_id': active.budgetId,
+                'category_name': category.category_name,
+                'start_date': active.start_date,
+                'total_expense': category.total_expense,
+                'period_expense': summary.total_expense,
+            }, key='category_name')
+            row['share'] = (
+                _round(category.total_expense / summary.total_expense * 100)
+                if summary.total_expense else None
+            )
+            category_rows.append(row)
+        category_rows.sort(key=lambda row: (row['category_name'], row['start_date']))
+
+    return {'periods': period_rows, 'categories': category_rows}
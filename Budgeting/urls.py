@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     # Dashboard
     path('dashboard/', views.dashboard, name='budgeting_dashboard'),
+    path('events/', views.dashboard_events, name='dashboard_events'),  # SSE, see backend/asgi.py
     
     # Budget Setup
     path('budget/setup/', views.budget_setup, name='budget_setup'),
@@ -19,6 +20,14 @@ urlpatterns = [
     
     # Calendar
     path('calendar/', views.calendar_view, name='calendar_dashboard'),
+    path('calendar/year/', views.year_view, name='year_heatmap'),
+    
+    # Trends
+    path('trends/', views.trends, name='trends'),
+    path('api/trends/', views.trends_api, name='trends_api'),
+    path('api/balance/', views.balance_api, name='balance_api'),
+    path('api/transactions/batch/', views.transactions_batch_api, name='transactions_batch_api'),
+    path('reports/<int:budget_id>/', views.period_report, name='period_report'),
     
     # Goals
     path('goals/', views.goals_list, name='goals_list'),
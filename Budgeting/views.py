@@ -3,26 +3,44 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.utils import timezone
-from django.http import JsonResponse
+from django.db import IntegrityError, router, transaction as db_transaction
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_POST
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+from backend.replicas import read_only, use_primary
 from datetime import datetime, timedelta
 from decimal import Decimal
 import calendar
+import gzip
+import hashlib
+import json
+import re
+from . import batch, fx, ledger, live, money, reports
+from .active_budget import get_active_budget, set_active_budget
+from .archive import ensure_hot
+from .conditional import budget_page_etag, conditional_page, goals_page_etag
+from .heatmap import METRICS, get_year_totals, heatmap_weeks, month_labels
+from .search import search_transactions
+from .services import refresh_summaries
+from .trends import MAX_PERIODS, get_trends
 from .models import (
     MonthlyBudget,
     Category,
     Transaction,
     DailySummary,
-    MonthlySummary,
     Goal,
+    IdempotencyKey,
 )
 
 User = get_user_model()
 
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
 
 # --- 1. ADD THIS HELPER FUNCTION (Put this above dashboard view) ---
-def get_calendar_data(user, year, month):
+def get_calendar_data(active_budget, year, month):
     """Helper to generate calendar grid with income/expense data"""
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
     if not active_budget:
         return [], {}
 
@@ -33,22 +51,33 @@ def get_calendar_data(user, year, month):
     else:
         last_day = datetime(year, month + 1, 1).date() - timedelta(days=1)
 
-    # Fetch Transactions
-    transactions = Transaction.objects.filter(
+    # Fetch Transactions as integer-cent columns
+    rows = Transaction.objects.filter(
         monthly_budget=active_budget, date__gte=first_day, date__lte=last_day
-    )
-
-    # Aggregate Data by Date
-    daily_data = {}
-    for t in transactions:
-        d_str = t.date.strftime("%Y-%m-%d")
-        if d_str not in daily_data:
-            daily_data[d_str] = {"income": 0, "expense": 0}
-
-        if t.transaction_type == "income":
-            daily_data[d_str]["income"] += float(t.amount)
-        else:
-            daily_data[d_str]["expense"] += float(t.amount)
+    ).values_list("date", "transaction_type", "amount_minor")
+
+    # Aggregate Data by Date: bucket 2*(day-1) holds income, 2*(day-1)+1 expense
+    keys, amounts = [], []
+    for date, transaction_type, amount_minor in rows:
+        keys.append(2 * (date.day - 1) + (transaction_type == "expense"))
+        amounts.append(amount_minor)
+    buckets = money.bucket_totals(keys, amounts, 2 * last_day.day)
+
+    # Running balance from the prefix sums: one indexed read of the month's
+    # summaries plus the last one before the month starts
+    summaries = list(
+        DailySummary.objects.filter(monthly_budget=active_budget, date__lte=last_day)
+        .order_by("-date")
+        .values_list("date", "cumulative_net_minor")[:last_day.day + 1]
+    )[::-1]
+    balances, running, index = {}, 0, 0
+    for day in range(1, last_day.day + 1):
+        date = first_day.replace(day=day)
+        while index < len(summaries) and summaries[index][0] <= date:
+            running = summaries[index][1]
+            index += 1
+        if active_budget.start_date <= date <= active_budget.end_date:
+            balances[day] = money.from_minor(running)
 
     # Build the Grid
     cal = calendar.monthcalendar(year, month)
@@ -59,13 +88,12 @@ def get_calendar_data(user, year, month):
             if day == 0:
                 week_data.append(None)
             else:
-                date_key = f"{year}-{month:02d}-{day:02d}"
-                day_info = daily_data.get(date_key, {"income": 0, "expense": 0})
                 week_data.append(
                     {
                         "day": day,
-                        "income": day_info["income"],
-                        "expense": day_info["expense"],
+                        "income": money.from_minor(buckets[2 * (day - 1)]),
+                        "expense": money.from_minor(buckets[2 * (day - 1) + 1]),
+                        "balance": balances.get(day),
                     }
                 )
         final_calendar.append(week_data)
@@ -75,21 +103,36 @@ def get_calendar_data(user, year, month):
 
 # --- 2. REPLACE YOUR EXISTING dashboard VIEW WITH THIS ---
 @login_required(login_url='login')
+@read_only
+@conditional_page(budget_page_etag)
 def dashboard(request):
     """Main dashboard with mini-calendar"""
     user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     # Handle missing budget
     if not active_budget:
         if not MonthlyBudget.objects.filter(user=user).exists():
             return redirect('budget_setup')
         active_budget = MonthlyBudget.objects.filter(user=user).first()
-    
+        if active_budget.is_archived:
+            # Older budgets may have been moved to cold storage. Restoring
+            # them writes to the primary, which a replica may not have caught
+            # up with yet, so the page is read from the primary too.
+            with use_primary():
+                return _dashboard_page(request, ensure_hot(active_budget))
+
+    return _dashboard_page(request, active_budget)
+
+
+def _dashboard_page(request, active_budget):
+    user = request.user
+
     # Calendar Data for Dashboard (Current Month)
+    # Lazy: only evaluated when the cached calendar fragment is stale
     now = timezone.now()
     year, month = now.year, now.month
-    calendar_grid = get_calendar_data(user, year, month)
+    calendar_grid = SimpleLazyObject(lambda: get_calendar_data(get_active_budget(request), year, month))
 
     # Other Dashboard Data
     recent_transactions = Transaction.objects.filter(
@@ -110,12 +153,18 @@ def dashboard(request):
     }
     
     if active_budget:
+        total_income, total_spent = active_budget.get_totals()
         context.update({
             'total_budget': active_budget.total_budget,
-            'total_spent': active_budget.get_total_spent(),
-            'total_income': active_budget.get_total_income(),
-            'remaining_balance': active_budget.get_remaining_balance(),
-            'categories_summary': active_budget.get_categories_summary(),
+            'total_spent': total_spent,
+            'total_income': total_income,
+            'remaining_balance': active_budget.total_budget - total_spent,
+            'daily_allowance': active_budget.get_daily_allowance(now.date()),
+            # Kept up to date by refresh_summaries() on every write
+            'overspend_alerts': active_budget.overspend_alerts.filter(is_open=True),
+            # Written by the nightly detect_anomalies job
+            'anomalies': active_budget.anomalies.all()[:5],
+            'categories_summary': SimpleLazyObject(active_budget.get_categories_summary),
         })
     
     return render(request, 'Budgeting/dashboard.html', context)
@@ -178,12 +227,17 @@ def budget_setup(request):
     user = request.user
 
     # Check if user already has an active budget
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
+
+    # New budgets keep the currency of the one they replace
+    default_currency = active_budget.currency if active_budget else fx.DEFAULT_CURRENCY
+    currencies = fx.known_currencies(fx.DEFAULT_CURRENCY, default_currency)
 
     if request.method == "POST":
         # Get form data
         total_budget = request.POST.get("total_budget")
         start_date = request.POST.get("start_date")
+        currency = request.POST.get("currency") or default_currency
 
         # Validation
         errors = []
@@ -206,6 +260,9 @@ def budget_setup(request):
             except:
                 errors.append("Invalid date format")
 
+        if currency not in currencies:
+            errors.append("Unknown currency")
+
         if errors:
             return render(
                 request,
@@ -214,17 +271,21 @@ def budget_setup(request):
                     "errors": errors,
                     "total_budget": request.POST.get("total_budget"),
                     "start_date": request.POST.get("start_date"),
+                    "currency": currency,
+                    "currencies": currencies,
                     "active_budget": active_budget,
                 },
             )
 
-        # Deactivate previous active budgets
+        # Deactivate previous active budgets (they become trend history;
+        # creating the new budget below invalidates the cached trends)
         MonthlyBudget.objects.filter(user=user, is_active=True).update(is_active=False)
 
         # Create new budget
         budget = MonthlyBudget.objects.create(
-            user=user, start_date=start_date, total_budget=total_budget, is_active=True
+            user=user, start_date=start_date, total_budget=total_budget, currency=currency, is_active=True
         )
+        set_active_budget(user, budget)
 
         messages.success(request, "Budget created successfully! Now add categories.")
         return redirect("category_setup", budget_id=budget.budgetId)
@@ -234,6 +295,8 @@ def budget_setup(request):
         "Budgeting/budget_setup.html",
         {
             "active_budget": active_budget,
+            "currency": default_currency,
+            "currencies": currencies,
         },
     )
 
@@ -241,7 +304,7 @@ def budget_setup(request):
 @login_required(login_url="login")
 def category_setup(request, budget_id):
     """Setup budget categories"""
-    budget = get_object_or_404(MonthlyBudget, budgetId=budget_id, user=request.user)
+    budget = ensure_hot(get_object_or_404(MonthlyBudget, budgetId=budget_id, user=request.user))
 
     # Get existing categories
     existing_categories = Category.objects.filter(monthly_budget=budget)
@@ -372,18 +435,21 @@ def delete_category(request, category_id):
 
 
 @login_required(login_url="login")
+@read_only
+@conditional_page(budget_page_etag, shows_messages=True)
 def transactions_list(request):
     """View all transactions"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request, categories=True)
 
     if not active_budget:
         messages.warning(request, "Please set up your budget first.")
         return redirect("budget_setup")
 
     # Get all transactions for active budget
-    transactions = Transaction.objects.filter(monthly_budget=active_budget).order_by(
-        "-date", "-created_at"
+    transactions = (
+        Transaction.objects.filter(monthly_budget=active_budget)
+        .select_related("category")
+        .order_by("-date", "-created_at")
     )
 
     # Filter by type if specified
@@ -396,7 +462,19 @@ def transactions_list(request):
     if category_id:
         transactions = transactions.filter(category_id=category_id)
 
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    # Note search replaces the listing with ranked, paginated matches
+    query = request.GET.get("q", "").strip()
+    next_cursor = None
+    if query:
+        transactions, next_cursor = search_transactions(
+            active_budget,
+            query,
+            transaction_type=filter_type if filter_type in ["income", "expense"] else None,
+            category_id=category_id,
+            after=request.GET.get("after"),
+        )
+
+    categories = active_budget.categories.all()
 
     context = {
         "active_budget": active_budget,
@@ -404,6 +482,8 @@ def transactions_list(request):
         "categories": categories,
         "filter_type": filter_type,
         "filter_category": category_id,
+        "query": query,
+        "next_cursor": next_cursor,
     }
 
     return render(request, "Budgeting/transactions_list.html", context)
@@ -412,20 +492,21 @@ def transactions_list(request):
 @login_required(login_url="login")
 def add_transaction(request):
     """Add a new transaction (income or expense)"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    # Successful POSTs redirect without showing the categories
+    active_budget = get_active_budget(request, categories=request.method == "GET")
 
     if not active_budget:
         messages.warning(request, "Please set up your budget first.")
         return redirect("budget_setup")
 
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    categories = active_budget.categories.all()
 
     if request.method == "POST":
         transaction_type = request.POST.get("transaction_type")
         amount = request.POST.get("amount")
         category_id = request.POST.get("category")
         date = request.POST.get("date")
+        currency = request.POST.get("currency") or active_budget.currency
         note = request.POST.get("note", "").strip()
 
         errors = []
@@ -454,6 +535,11 @@ def add_transaction(request):
             except:
                 errors.append("Invalid date format")
 
+        if not errors:
+            rate_error = fx.rate_error(currency, active_budget.currency, date)
+            if rate_error:
+                errors.append(rate_error)
+
         if errors:
             return render(
                 request,
@@ -461,6 +547,8 @@ def add_transaction(request):
                 {
                     "errors": errors,
                     "categories": categories,
+                    "currencies": fx.known_currencies(active_budget.currency),
+                    "budget_currency": active_budget.currency,
                     "form_data": request.POST,
                 },
             )
@@ -470,16 +558,14 @@ def add_transaction(request):
             monthly_budget=active_budget,
             transaction_type=transaction_type,
             amount=amount,
+            currency=currency,
             category_id=category_id if category_id else None,
             date=date,
             note=note,
         )
 
-        # Update daily summary
-        DailySummary.update_or_create_for_date(active_budget, date)
-
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+        # Update daily, category and monthly summaries
+        refresh_summaries(active_budget, [date], [transaction.category_id])
 
         messages.success(
             request, f"{transaction_type.capitalize()} of {amount} added successfully!"
@@ -488,6 +574,8 @@ def add_transaction(request):
 
     context = {
         "categories": categories,
+        "currencies": fx.known_currencies(active_budget.currency),
+        "budget_currency": active_budget.currency,
         "today": timezone.now().date(),
     }
 
@@ -508,6 +596,7 @@ def edit_transaction(request, transaction_id):
         amount = request.POST.get("amount")
         category_id = request.POST.get("category")
         date = request.POST.get("date")
+        currency = request.POST.get("currency") or transaction.currency
         note = request.POST.get("note", "").strip()
 
         errors = []
@@ -536,6 +625,11 @@ def edit_transaction(request, transaction_id):
             except:
                 errors.append("Invalid date format")
 
+        if not errors:
+            rate_error = fx.rate_error(currency, active_budget.currency, date)
+            if rate_error:
+                errors.append(rate_error)
+
         if errors:
             return render(
                 request,
@@ -544,27 +638,36 @@ def edit_transaction(request, transaction_id):
                     "errors": errors,
                     "transaction": transaction,
                     "categories": categories,
+                    "currencies": fx.known_currencies(active_budget.currency, transaction.currency),
                 },
             )
 
-        # Store old date for summary updates
-        old_date = transaction.date
-
-        # Update transaction
-        transaction.transaction_type = transaction_type
-        transaction.amount = amount
-        transaction.category_id = category_id if category_id else None
-        transaction.date = date
-        transaction.note = note
-        transaction.save()
-
-        # Update daily summaries (both old and new dates)
-        DailySummary.update_or_create_for_date(active_budget, old_date)
-        if old_date != date:
-            DailySummary.update_or_create_for_date(active_budget, date)
+        with db_transaction.atomic(using=router.db_for_write(Transaction, instance=transaction)):
+            # Lock the row: concurrent edits/deletes of it then run one at a
+            # time and each sees the date and category the previous one left
+            transaction = get_object_or_404(
+                Transaction.objects.select_for_update(), pk=transaction.pk
+            )
 
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+            # Store old date and category for summary updates
+            old_date = transaction.date
+            old_category_id = transaction.category_id
+
+            # Update transaction
+            transaction.transaction_type = transaction_type
+            transaction.amount = amount
+            transaction.currency = currency
+            transaction.category_id = category_id if category_id else None
+            transaction.date = date
+            transaction.note = note
+            transaction.save()
+
+            # Update summaries for both old and new dates/categories
+            refresh_summaries(
+                active_budget,
+                [old_date, date],
+                [old_category_id, transaction.category_id],
+            )
 
         messages.success(request, "Transaction updated successfully!")
         return redirect("transactions_list")
@@ -572,6 +675,7 @@ def edit_transaction(request, transaction_id):
     context = {
         "transaction": transaction,
         "categories": categories,
+        "currencies": fx.known_currencies(active_budget.currency, transaction.currency),
     }
 
     return render(request, "Budgeting/edit_transaction.html", context)
@@ -586,15 +690,18 @@ def delete_transaction(request, transaction_id):
 
     if request.method == "POST":
         active_budget = transaction.monthly_budget
-        date = transaction.date
-
-        transaction.delete()
+        with db_transaction.atomic(using=router.db_for_write(Transaction, instance=transaction)):
+            # Lock the row so a concurrent edit cannot move it after we read its date
+            transaction = get_object_or_404(
+                Transaction.objects.select_for_update(), pk=transaction.pk
+            )
+            date = transaction.date
+            category_id = transaction.category_id
 
-        # Update daily summary
-        DailySummary.update_or_create_for_date(active_budget, date)
+            transaction.delete()
 
-        # Update monthly summary
-        MonthlySummary.update_or_create_for_budget(active_budget)
+            # Update daily, category and monthly summaries
+            refresh_summaries(active_budget, [date], [category_id])
 
         messages.success(request, "Transaction deleted successfully!")
         return redirect("transactions_list")
@@ -607,19 +714,19 @@ def delete_transaction(request, transaction_id):
 @login_required(login_url="login")
 def quick_add_transaction(request):
     """Quick add transaction (AJAX-friendly)"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request, categories=request.method == "GET")
 
     if not active_budget:
         messages.warning(request, "Please set up your budget first.")
         return redirect("budget_setup")
 
-    categories = Category.objects.filter(monthly_budget=active_budget)
+    categories = active_budget.categories.all()
 
     if request.method == "POST":
         transaction_type = request.POST.get("transaction_type")
         amount = request.POST.get("amount")
         category_id = request.POST.get("category")
+        currency = request.POST.get("currency") or active_budget.currency
         note = request.POST.get("note", "").strip()
 
         errors = []
@@ -640,20 +747,27 @@ def quick_add_transaction(request):
         if transaction_type == "expense" and not category_id:
             errors.append("Category is required for expenses")
 
+        today = timezone.now().date()
+        rate_error = fx.rate_error(currency, active_budget.currency, today)
+        if rate_error:
+            errors.append(rate_error)
+
         if not errors:
             # Create transaction with today's date
             transaction = Transaction.objects.create(
                 monthly_budget=active_budget,
                 transaction_type=transaction_type,
                 amount=amount,
+                currency=currency,
                 category_id=category_id if category_id else None,
-                date=timezone.now().date(),
+                date=today,
                 note=note,
             )
 
             # Update summaries
-            DailySummary.update_or_create_for_date(active_budget, timezone.now().date())
-            MonthlySummary.update_or_create_for_budget(active_budget)
+            refresh_summaries(
+                active_budget, [transaction.date], [transaction.category_id]
+            )
 
             messages.success(
                 request, f"{transaction_type.capitalize()} added successfully!"
@@ -669,10 +783,11 @@ def quick_add_transaction(request):
 
 # --- 3. REPLACE YOUR EXISTING calendar_view WITH THIS ---
 @login_required(login_url='login')
+@read_only
+@conditional_page(budget_page_etag)
 def calendar_view(request):
     """Calendar view with Day Details"""
-    user = request.user
-    active_budget = MonthlyBudget.objects.filter(user=user, is_active=True).first()
+    active_budget = get_active_budget(request)
     
     if not active_budget:
         messages.warning(request, 'Please set up your budget first.')
@@ -695,8 +810,8 @@ def calendar_view(request):
         except ValueError:
             pass # Handle invalid dates
 
-    # Get Grid using Helper
-    final_calendar = get_calendar_data(user, year, month)
+    # Get Grid using Helper (lazy: skipped when the cached grid is fresh)
+    final_calendar = SimpleLazyObject(lambda: get_calendar_data(active_budget, year, month))
 
     # Navigation Logic
     prev_month = month - 1 if month > 1 else 12
@@ -721,7 +836,180 @@ def calendar_view(request):
     return render(request, 'Budgeting/calendar_dashboard.html', context)
 
 
+@login_required(login_url='login')
+@read_only
+def year_view(request):
+    """Heatmap of one year's daily expense, income or net across all budgets"""
+    today = timezone.now().date()
+    try:
+        year = min(max(int(request.GET.get('year', today.year)), 2), 9998)
+    except ValueError:
+        year = today.year
+    metric = request.GET.get('metric')
+    if metric not in METRICS:
+        metric = 'expense'
+
+    totals = get_year_totals(request.user, year)
+    total_income = money.from_minor(sum(totals['income']))
+    total_expense = money.from_minor(sum(totals['expense']))
+
+    context = {
+        'year': year,
+        'metric': metric,
+        'metrics': METRICS,
+        'weeks': heatmap_weeks(totals, metric),
+        'month_labels': month_labels(year),
+        'total_income': total_income,
+        'total_expense': total_expense,
+        'total_net': total_income - total_expense,
+        'prev_year': year - 1,
+        'next_year': year + 1,
+    }
+
+    return render(request, 'Budgeting/year_heatmap.html', context)
+
+
+@login_required(login_url="login")
+def dashboard_events(request):
+    """Live dashboard updates; only reached under WSGI.
+
+    backend/asgi.py serves this path itself as a server-sent event stream
+    (see backend/events.py). Here it would tie up a worker thread per open
+    tab, so browsers are told to stop trying.
+    """
+    return HttpResponse("Live updates need the ASGI server.", status=501, content_type="text/plain")
+
+
+def _requested_periods(request, default=12):
+    """Number of periods asked for in ?periods=, clamped to a sane range"""
+    try:
+        periods = int(request.GET.get("periods", default))
+    except ValueError:
+        periods = default
+    return max(1, min(periods, MAX_PERIODS))
+
+
+@login_required(login_url="login")
+@read_only
+def trends(request):
+    """Spending trends across past budget periods"""
+    periods = _requested_periods(request)
+
+    context = {
+        "trends": get_trends(request.user, periods),
+        "periods": periods,
+        "period_choices": [3, 6, 12, 24, 60],
+    }
+
+    return render(request, "Budgeting/trends.html", context)
+
+
+def _replay(stored, request_hash):
+    """Response for a retried batch request"""
+    if stored.request_hash != request_hash:
+        return JsonResponse(
+            {"error": "Idempotency-Key was already used for a different request"}, status=422
+        )
+    response = JsonResponse(stored.response, status=stored.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
 @login_required(login_url="login")
+@require_POST
+def transactions_batch_api(request):
+    """Create, update and delete many transactions at once (format in batch.py).
+
+    With an Idempotency-Key header, a retry of the same request returns the
+    first response instead of applying the batch again.
+    """
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Body must be JSON"}, status=400)
+    operations = body.get("operations") if isinstance(body, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({"error": "operations must be a non-empty list"}, status=400)
+    if len(operations) > batch.MAX_OPERATIONS:
+        return JsonResponse({"error": f"At most {batch.MAX_OPERATIONS} operations per batch"}, status=400)
+
+    key = request.headers.get("Idempotency-Key", "")
+    if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+        return JsonResponse({"error": "Idempotency-Key is too long"}, status=400)
+    request_hash = hashlib.sha256(request.body).hexdigest()
+    if key and (stored := batch.find_key(request.user, key)):
+        return _replay(stored, request_hash)
+
+    try:
+        with db_transaction.atomic(using=router.db_for_write(IdempotencyKey)):
+            payload = {"results": batch.apply_batch(request.user, operations)}
+            if key:
+                batch.save_key(request.user, key, request_hash, 200, payload)
+    except batch.BatchError as error:
+        return JsonResponse({"error": "No operations were applied", "results": error.results}, status=400)
+    except IntegrityError:
+        # A concurrent retry with the same key committed first; ours was rolled back
+        stored = batch.find_key(request.user, key) if key else None
+        if stored is None:
+            raise
+        return _replay(stored, request_hash)
+    return JsonResponse(payload)
+
+
+@login_required(login_url="login")
+@read_only
+def trends_api(request):
+    """Trends as JSON (same data as the trends page)"""
+    return JsonResponse(get_trends(request.user, _requested_periods(request)))
+
+
+@login_required(login_url="login")
+@read_only
+def balance_api(request):
+    """Balance of the active budget at the end of ?date=YYYY-MM-DD (default today)"""
+    active_budget = get_active_budget(request)
+    if not active_budget:
+        return JsonResponse({"error": "No active budget"}, status=404)
+
+    try:
+        day = datetime.strptime(request.GET["date"], "%Y-%m-%d").date() if "date" in request.GET else timezone.now().date()
+    except ValueError:
+        return JsonResponse({"error": "date must be YYYY-MM-DD"}, status=400)
+
+    return JsonResponse({
+        "budget": active_budget.pk,
+        "date": day.isoformat(),
+        "balance": str(ledger.balance_as_of(active_budget, day)),
+    })
+
+
+@login_required(login_url="login")
+@read_only
+def period_report(request, budget_id):
+    """Frozen report of an ended budget period, as stored (see reports.py)"""
+    budget = get_object_or_404(MonthlyBudget, budgetId=budget_id, user=request.user)
+    report = reports.get_report(budget)
+    if report is None:
+        return JsonResponse({"error": "This period has not ended yet"}, status=409)
+
+    etag = f'"{budget.pk}-{report.budget_version}-{report.built_at.timestamp():.0f}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        payload = bytes(report.payload)
+        if ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+            response = HttpResponse(payload, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(payload), content_type="application/json")
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required(login_url="login")
+@read_only
+@conditional_page(goals_page_etag, shows_messages=True)
 def goals_list(request):
     """View all goals"""
     user = request.user
@@ -806,30 +1094,22 @@ def update_goal_progress(request, goal_id):
                 messages.error(request, "Cannot add negative amount")
                 return redirect("goals_list")
 
-            # Calculate what the NEW total would be
-            new_total = goal.current_progress + amount_to_add
-
             # Validation: Don't let them save more than the target
-            if new_total > goal.target_amount:
+            # (checked and added in one UPDATE, safe against concurrent adds)
+            if not goal.add_contribution(amount_to_add):
                 messages.error(
                     request,
                     f"Cannot add {amount_to_add}. It exceeds the target! You only need {goal.target_amount - goal.current_progress} more.",
                 )
             else:
-                # ✅ THIS IS THE FIX: We ADD to the existing amount
-                goal.current_progress = new_total
-
-                # Check completion
-                if goal.current_progress >= goal.target_amount:
-                    goal.is_completed = True
+                # add_contribution() updates without save(), so no signal fires
+                live.publish_goal(goal)
+                if goal.is_completed:
                     messages.success(
                         request, f'🎉 Congratulations! Goal "{goal.title}" completed!'
                     )
                 else:
-                    goal.is_completed = False
                     messages.success(request, f"Added {amount_to_add} to your savings!")
-
-                goal.save()
         except:
             messages.error(request, "Invalid amount")
 
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class UserauthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'UserAuth'
-    verbose_name = 'User Authentication'
\ No newline at end of file
+    verbose_name = 'User Authentication'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    """Cache key under which an authenticated user object is stored"""
+    return f"auth:user:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that serves the per-request user lookup from the cache.
+
+    AuthenticationMiddleware calls get_user() on every request; caching the
+    User object removes that SELECT. Entries are dropped whenever the user is
+    saved or deleted (see UserAuth.signals).
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+
+SESSION_REFRESHED_KEY = '_session_refreshed_at'
+
+
+class SessionRefreshMiddleware:
+    """Slide the session expiry at most once per SESSION_REFRESH_INTERVAL.
+
+    Replaces SESSION_SAVE_EVERY_REQUEST, which writes the session on every
+    page view. Must be listed after SessionMiddleware so it runs before the
+    session is saved on the way out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.interval = settings.SESSION_REFRESH_INTERVAL
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        session = getattr(request, 'session', None)
+        if session is None or session.modified or session.is_empty():
+            return response
+
+        now = int(time.time())
+        if now - session.get(SESSION_REFRESHED_KEY, 0) >= self.interval:
+            # Marking the session modified makes SessionMiddleware save it,
+            # which also pushes the expiry date forward.
+            session[SESSION_REFRESHED_KEY] = now
+        return response
@@ -37,6 +37,13 @@ class User(AbstractBaseUser, PermissionsMixin):
     date_joined = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Denormalized pointer to the active budget, cached with the user (see
+    # Budgeting.active_budget). No database constraint: with sharding,
+    # budgets live on another database.
+    active_budget = models.ForeignKey(
+        'Budgeting.MonthlyBudget', null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='+'
+    )
     
     objects = UserManager()
     
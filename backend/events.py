@@ -0,0 +1,163 @@
+"""
+Server-sent events for live dashboards.
+
+Writers publish small JSON events for a user once their transaction commits
+(see Budgeting/live.py). Every open dashboard of that user receives them
+over GET /budget/events/, which backend/asgi.py answers itself, in front of
+the Django middleware stack: authentication is one short call on a worker
+thread that closes its database connections when it returns. After that an
+open stream is only a queue on the event loop. It holds no thread and no
+database connection, however long it stays open.
+
+Events travel through the broker named by EVENT_BROKER. LocalBroker fans
+them out inside one process, so it covers one ASGI server process serving
+the whole site (writes included). It stands in for a cross-worker broker
+(e.g. Redis pub/sub), which would provide the same publish()/subscribe()
+pair.
+
+Under WSGI (runserver) the path is served by an ordinary view that answers
+501, since a streaming response would tie up a worker thread per tab.
+"""
+import asyncio
+import io
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+
+EVENTS_PATH = '/budget/events/'
+KEEPALIVE_SECONDS = 20  # comment lines keep proxies from closing idle streams
+QUEUE_SIZE = 100  # events buffered per stream before it is told to reload
+RETRY_MS = 5000  # how long browsers wait before reconnecting
+
+
+class LocalBroker:
+    """In-process pub/sub: one bounded asyncio queue per open stream.
+
+    publish() may be called from any thread (views run on worker threads);
+    events are handed to each subscriber's event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)  # user id -> {(loop, queue)}
+
+    def publish(self, user_id, events):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, events)
+            except RuntimeError:
+                pass  # the loop is closed; its stream is going away
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        queue = asyncio.Queue(QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(entry)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+
+def _offer(queue, events):
+    """Queue events for one stream; a stream that fell behind is asked to reload"""
+    for event in events:
+        if queue.full():
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({'type': 'resync'})
+            return
+        queue.put_nowait(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def publish_on_commit(user_id, events, model, instance=None):
+    """Publish ``events`` to ``user_id`` once the write to ``model`` commits"""
+    if events:
+        using = router.db_for_write(model, instance=instance)
+        transaction.on_commit(lambda: get_broker().publish(user_id, events), using=using)
+
+
+def encode(event):
+    """One event in text/event-stream framing"""
+    data = json.dumps({k: v for k, v in event.items() if k != 'type'}, cls=DjangoJSONEncoder)
+    return f"event: {event['type']}\ndata: {data}\n\n".encode()
+
+
+def _authenticated_user_id(scope):
+    """The session's user id, or None; runs on a worker thread"""
+    request = ASGIRequest(scope, io.BytesIO())
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = engine.SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+        user = auth.get_user(request)
+        return user.pk if user.is_authenticated else None
+    finally:
+        # The stream must not keep this thread's connections open
+        connections.close_all()
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def event_stream(scope, receive, send):
+    """ASGI app for EVENTS_PATH"""
+    user_id = await sync_to_async(_authenticated_user_id, thread_sensitive=False)(scope)
+    if user_id is None:
+        await send({'type': 'http.response.start', 'status': 403, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Log in to receive updates.'})
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),  # nginx: pass events through unbuffered
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': f'retry: {RETRY_MS}\n\n'.encode(), 'more_body': True})
+
+    async with get_broker().subscribe(user_id) as queue:
+        disconnected = asyncio.ensure_future(_disconnected(receive))
+        try:
+            while True:
+                event = asyncio.ensure_future(queue.get())
+                done, _pending = await asyncio.wait(
+                    {event, disconnected}, timeout=KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                if disconnected in done:
+                    event.cancel()
+                    return
+                if event in done:
+                    body = encode(event.result())
+                else:
+                    event.cancel()
+                    body = b': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            disconnected.cancel()
@@ -0,0 +1,108 @@
+"""
+Read-replica routing.
+
+Views wrapped in @read_only send Budgeting reads to one of the configured
+replicas (see DATABASE_REPLICAS in settings). Everything else goes to the
+primary ("default"):
+
+* any request that is not GET/HEAD/OPTIONS,
+* browsers that wrote within the last READ_YOUR_WRITES_SECONDS, which carry
+  the cookie set by PrimaryPinMiddleware, so users always see their own
+  changes,
+* reads issued inside a transaction on the primary, or inside a
+  use_primary() block, e.g. a view that has just rehydrated an archived
+  budget and reads the restored rows back.
+
+When budget data is sharded (backend/shards.py), ShardRouter answers first
+and replicas only serve the global database.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'pin_primary'
+REPLICATED_APPS = {'Budgeting'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias chosen for the current request, or None for the primary
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def choose_replica(request):
+    """Replica alias for this request, or None when it must use the primary"""
+    replicas = replica_aliases()
+    if not replicas or request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+        return None
+    return random.choice(replicas)
+
+
+def read_only(view):
+    """Serve the view's Budgeting reads from a replica when it is safe to"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_alias.set(choose_replica(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Send the block's reads to the primary, even inside a @read_only view"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Database router for @read_only views; writes always hit the primary"""
+
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label not in REPLICATED_APPS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return False if db in replica_aliases() else None
+
+
+class PrimaryPinMiddleware:
+    """After a write, pin the browser to the primary for a short window"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and replica_aliases():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.READ_YOUR_WRITES_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -10,13 +10,15 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 from pathlib import Path
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-
 BASE_DIR = Path(__file__).resolve().parent.parent
-load_dotenv(BASE_DIR / '.env')
+
+# Read .env once, and only import python-dotenv when there is one: deployed
+# workers usually get their environment from the process manager.
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -53,10 +55,13 @@ NPM_BIN_PATH = "npm"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'backend.replicas.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'UserAuth.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.shards.ShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,8 +103,47 @@ DATABASES = {
         'PORT': os.getenv('DATABASE_PORT', ''),
     }
 }
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # Take the write lock when a transaction begins: concurrent writers then
+    # wait (up to the timeout, in seconds) instead of failing with "database
+    # is locked" when a transaction that has read tries to write.
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20}
+
+# Read replicas: comma-separated hosts, or file paths when using sqlite (a
+# copy of the primary file works as a local stand-in). They share the
+# primary's engine and credentials. @read_only views read from them; see
+# backend/replicas.py.
+for _number, _replica in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{_number}'] = {
+        **DATABASES['default'],
+        ('NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'): _replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Shards for budget data, keyed by user (same format as DATABASE_REPLICAS).
+# "default" then only holds global data: users, sessions and the shard
+# directory. Run `migrate --database shardN` for each one; see backend/shards.py.
+for _number, _shard in enumerate(filter(None, os.getenv('DATABASE_SHARDS', '').split(',')), start=1):
+    DATABASES[f'shard{_number}'] = {
+        **DATABASES['default'],
+        ('NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'): _shard.strip(),
+    }
+
+DATABASE_ROUTERS = ['backend.shards.ShardRouter', 'backend.replicas.ReplicaRouter']
+# Seconds a browser keeps reading from the primary after it writes
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', 5))
 # ============================================================
 
+# ===== Cache (sessions and the authenticated user are served from here) =====
+# Local memory is per-process; point this at Redis/Memcached when running
+# more than one worker so invalidations are seen by every process.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -130,6 +174,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.getenv('STATIC_ROOT', BASE_DIR / 'staticfiles')  # collectstatic output
 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
@@ -147,7 +192,28 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'budgeting_dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
+# ============================================================
+# Budget data retention
+# ============================================================
+# Inactive budgets that ended longer ago than this are moved to compressed
+# archives by `manage.py archive_budgets` and restored when opened.
+BUDGET_ARCHIVE_RETENTION_DAYS = int(os.getenv('BUDGET_ARCHIVE_RETENTION_DAYS', 365))
+
+# Pub/sub for live dashboard updates (see backend/events.py). LocalBroker
+# only reaches streams served by the same process.
+EVENT_BROKER = os.getenv('EVENT_BROKER', 'backend.events.LocalBroker')
+
+# Load the user from the cache instead of the database on every request
+AUTHENTICATION_BACKENDS = ['UserAuth.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', 300))  # seconds
+
 # Session settings - expire when browser closes
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
-SESSION_SAVE_EVERY_REQUEST = True
\ No newline at end of file
+# cached_db reads sessions from the cache; set SESSION_ENGINE to
+# django.contrib.sessions.backends.signed_cookies to skip storage entirely.
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+# Expiry is slid by UserAuth.middleware.SessionRefreshMiddleware at most once
+# per SESSION_REFRESH_INTERVAL instead of saving the session on every request.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_INTERVAL = int(os.getenv('SESSION_REFRESH_INTERVAL', 300))  # seconds
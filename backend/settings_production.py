@@ -0,0 +1,53 @@
+"""
+Production settings for backend project.
+
+Use with DJANGO_SETTINGS_MODULE=backend.settings_production. Everything is
+inherited from backend.settings; only production-specific overrides live here.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+# django-tailwind only builds the CSS (`manage.py tailwind build`, run before
+# collectstatic); workers don't need to load it. The theme app stays: it holds
+# the base template, the built stylesheet and the static files storage and
+# middleware below.
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != 'tailwind']
+
+# Compile each template once per process instead of re-reading and re-parsing
+# it from disk on every render.
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            # {% load tailwind_tags %} without the tailwind app
+            'libraries': {'tailwind_tags': 'theme.templatetags.theme_tags'},
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Content-hashed, precompressed static files served by the app itself with
+# immutable caching. Build the CSS under the default settings (this profile
+# drops the tailwind app and its command), then collect under this profile
+# so the compressed manifest storage below writes the files:
+#   python manage.py tailwind build
+#   DJANGO_SETTINGS_MODULE=backend.settings_production python manage.py collectstatic --noinput
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'theme.storage.CompressedManifestStaticFilesStorage'},
+}
+
+MIDDLEWARE = [
+    MIDDLEWARE[0],  # SecurityMiddleware
+    'theme.middleware.StaticFilesMiddleware',
+    *MIDDLEWARE[1:],
+]
@@ -0,0 +1,205 @@
+"""
+Horizontal sharding of budget data by user.
+
+With DATABASE_SHARDS configured, every Budgeting row lives on its owner's
+shard ("shard1", "shard2", ...). Users, sessions, the shard directory and
+the exchange rates stay on the global "default" database. A user's shard is recorded in the
+ShardAssignment directory table on first use, chosen by a stable hash of
+the user id, and can later be changed with `manage.py rebalance_shard`.
+
+ShardMiddleware makes the current request's user the shard key. Code that
+runs outside a request, such as management commands, selects a shard
+explicitly:
+
+    for alias in shard_aliases():
+        with use_shard(alias):
+            ...
+
+Each shard allocates primary keys from its own range of SHARD_ID_STRIDE ids,
+so rows keep their ids when they move between shards. (SQLite continues
+after the highest id in a table, so on the local SQLite setup a shard that
+received rows from a higher range keeps allocating from it; a later move
+that collides fails and rolls back instead of overwriting anything.)
+
+When sharding is off, ShardRouter defers to the next router and everything
+stays on "default".
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+
+SHARDED_APPS = {'Budgeting'}
+GLOBAL_MODELS = {'Budgeting.shardassignment', 'Budgeting.fxrate'}
+SHARD_ID_STRIDE = 100_000_000  # fits the 32-bit AutoField primary keys
+DIRECTORY_CACHE_TIMEOUT = 60  # seconds
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Explicit shard override (use_shard), then the request being served
+_shard_override = ContextVar('shard_override', default=None)
+_request = ContextVar('shard_request', default=None)
+
+
+def shard_aliases():
+    """Database aliases holding budget data, in directory order"""
+    shards = [alias for alias in settings.DATABASES if alias.startswith('shard')]
+    return shards or [DEFAULT_DB_ALIAS]
+
+
+def sharding_enabled():
+    return shard_aliases() != [DEFAULT_DB_ALIAS]
+
+
+def is_sharded(model):
+    return (
+        model._meta.app_label in SHARDED_APPS
+        and model._meta.label_lower not in GLOBAL_MODELS
+    )
+
+
+def hashed_shard(user_id):
+    """Stable (process- and restart-independent) default shard for a user"""
+    shards = shard_aliases()
+    digest = hashlib.sha1(str(user_id).encode()).digest()
+    return shards[int.from_bytes(digest[:8], 'big') % len(shards)]
+
+
+def directory_cache_key(user_id):
+    return f"shard:user:{user_id}"
+
+
+def lookup_user_shard(user_id):
+    """(alias, is_moving) for a user, assigning a shard on first use"""
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS, False
+
+    key = directory_cache_key(user_id)
+    entry = cache.get(key)
+    if entry is None:
+        from Budgeting.models import ShardAssignment
+
+        assignment, _created = ShardAssignment.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id, defaults={'shard': hashed_shard(user_id)}
+        )
+        entry = (assignment.shard, assignment.is_moving)
+        cache.set(key, entry, DIRECTORY_CACHE_TIMEOUT)
+    return entry
+
+
+def shard_for_user(user_id):
+    return lookup_user_shard(user_id)[0]
+
+
+def current_shard():
+    """Shard for the running code: use_shard() override, else the request user"""
+    alias = _shard_override.get()
+    if alias is not None:
+        return alias
+    request = _request.get()
+    if request is None:
+        return DEFAULT_DB_ALIAS
+    if not hasattr(request, '_shard_alias'):
+        user = request.user
+        request._shard_alias = shard_for_user(user.pk) if user.is_authenticated else DEFAULT_DB_ALIAS
+    return request._shard_alias
+
+
+@contextmanager
+def use_shard(alias):
+    """Route budget queries in the block to ``alias``"""
+    token = _shard_override.set(alias)
+    try:
+        yield alias
+    finally:
+        _shard_override.reset(token)
+
+
+def reserve_id_range(connection):
+    """Start the shard's id sequences at its own SHARD_ID_STRIDE range"""
+    if connection.alias not in shard_aliases() or not sharding_enabled():
+        return
+    from django.apps import apps
+
+    base = (shard_aliases().index(connection.alias) + 1) * SHARD_ID_STRIDE
+    with connection.cursor() as cursor:
+        for model in apps.get_app_config('Budgeting').get_models():
+            if not is_sharded(model):
+                continue
+            table, pk = model._meta.db_table, model._meta.pk.column
+            if connection.vendor == 'sqlite':
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, base])
+                elif row[0] < base:
+                    cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [base, table])
+            elif connection.vendor == 'postgresql':
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, %s), "
+                    "GREATEST(%s, (SELECT COALESCE(MAX({pk}), 0) FROM {table})))".format(
+                        pk=connection.ops.quote_name(pk), table=connection.ops.quote_name(table)
+                    ),
+                    [table, pk, base],
+                )
+
+
+class ShardRouter:
+    """Send sharded models to the current user's shard, the rest to default"""
+
+    def _db(self, model, hints):
+        if not sharding_enabled():
+            return None
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and is_sharded(instance.__class__) and instance._state.db:
+            return instance._state.db
+        return current_shard()
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not sharding_enabled():
+            return None
+        sharded1, sharded2 = is_sharded(obj1.__class__), is_sharded(obj2.__class__)
+        if sharded1 and sharded2:
+            return obj1._state.db == obj2._state.db
+        # Budget rows point at users on the global database
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Shards carry the full schema so historic migrations apply unchanged;
+        # only the budget tables are ever populated there.
+        return None
+
+
+class ShardMiddleware:
+    """Use the authenticated user as the shard key for the request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(request)
+        try:
+            if (
+                sharding_enabled()
+                and request.method not in SAFE_METHODS
+                and request.user.is_authenticated
+                and lookup_user_shard(request.user.pk)[1]
+            ):
+                # The user's rows are being moved; writes resume shortly
+                response = HttpResponse("Your data is being moved, please retry shortly.", status=503)
+                response['Retry-After'] = '5'
+                return response
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
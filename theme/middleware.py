@@ -0,0 +1,137 @@
+import json
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+# Preferred order when the browser accepts several encodings equally
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def parse_accept_encoding(header):
+    """{coding: q-value} of an Accept-Encoding header (q=0: not acceptable)"""
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+class StaticFile:
+    """One collected file and its precompressed variants"""
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = int(stat.st_mtime)
+        self.last_modified = http_date(self.mtime)
+        self.tag = f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL
+        self.variants = {
+            encoding: path + suffix
+            for encoding, suffix in ENCODINGS
+            if os.path.exists(path + suffix)
+        }
+
+    def pick(self, accept_encoding):
+        """Return (path, encoding) of the variant the client accepts with the highest q-value.
+
+        Ties go to the first one in ENCODINGS; the uncompressed file is sent
+        when no variant is acceptable.
+        """
+        qualities = parse_accept_encoding(accept_encoding)
+        best, best_quality = None, 0.0
+        for encoding, _suffix in ENCODINGS:
+            quality = qualities.get(encoding, qualities.get('*', 0.0))
+            if encoding in self.variants and quality > best_quality:
+                best, best_quality = encoding, quality
+        if best is None:
+            return self.path, None
+        return self.variants[best], best
+
+    def etag(self, encoding):
+        """Each encoding is its own representation, so it gets its own validator"""
+        return f'"{self.tag}-{encoding}"' if encoding else f'"{self.tag}"'
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT from the app process with far-future caching.
+
+    Files whose names are content-hashed (listed in the staticfiles manifest)
+    are sent with an immutable Cache-Control, so browsers never revalidate
+    them. The file index is built once at startup; run collectstatic and
+    restart workers to pick up new assets.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.files = self._build_index(settings.STATIC_ROOT)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            static_file = self.files.get(request.path[len(self.prefix):])
+            if static_file is not None:
+                return self.serve(request, static_file)
+        return self.get_response(request)
+
+    def serve(self, request, static_file):
+        path, encoding = static_file.pick(request.headers.get('Accept-Encoding', ''))
+        etag = static_file.etag(encoding)
+        # Handles ETag lists, W/ prefixes, "*" and If-Modified-Since
+        response = get_conditional_response(request, etag=etag, last_modified=static_file.mtime)
+        if response is None:
+            if request.method == 'HEAD':
+                response = HttpResponse(content_type=static_file.content_type)
+            else:
+                response = FileResponse(open(path, 'rb'), content_type=static_file.content_type)
+                # FileResponse derives this from the (possibly .gz/.br) file name
+                del response['Content-Disposition']
+            response['Content-Length'] = os.path.getsize(path)
+            if encoding:
+                response['Content-Encoding'] = encoding
+            response['Last-Modified'] = static_file.last_modified
+
+        response['ETag'] = etag
+        response['Cache-Control'] = static_file.cache_control
+        if static_file.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+    def _build_index(self, root):
+        if not root or not os.path.isdir(root):
+            return {}
+
+        hashed = set()
+        manifest_path = os.path.join(root, 'staticfiles.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                hashed = set(json.load(f).get('paths', {}).values())
+
+        files = {}
+        for directory, _dirs, names in os.walk(root):
+            for name in names:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(directory, name)
+                url = os.path.relpath(path, root).replace(os.sep, '/')
+                files[url] = StaticFile(path, immutable=url in hashed)
+        return files
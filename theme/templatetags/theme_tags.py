@@ -0,0 +1,22 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+# Where `manage.py tailwind build` writes the stylesheet (django-tailwind's default)
+CSS_PATH = 'css/dist/styles.css'
+
+
+@register.simple_tag
+def tailwind_css(v=None):
+    """The built stylesheet, as django-tailwind's tag renders it without DEBUG.
+
+    backend.settings_production registers this library as ``tailwind_tags``
+    so the templates render without the tailwind app installed.
+    """
+    href = static(getattr(settings, 'TAILWIND_CSS_PATH', CSS_PATH))
+    if v:
+        href = f'{href}?v={v}'
+    return format_html('<link rel="stylesheet" type="text/css" href="{}">', href)